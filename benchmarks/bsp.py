@@ -0,0 +1,63 @@
+"""
+BSP benchmark
+builds a BSPTree of the faces of static cubes, loads it back from its cache and compares
+ordering its fragments back to front from random positions with sorting the faces by depth
+
+python -m benchmarks.bsp --cubes 100 300 1000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from time import perf_counter
+import numpy as np
+from core.bsp import BSPTree, object_polygons
+from benchmarks.frames import generate_scene
+
+def run(cubes, positions, seed):
+    radius = (cubes / 10) ** 0.5
+    objects = generate_scene(cubes, radius, seed)
+    vertices, offsets, _, _ = object_polygons(objects)
+    start = perf_counter()
+    tree = BSPTree.from_objects(objects)
+    build = perf_counter() - start
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "scene.npz")
+        tree.save(path)
+        start = perf_counter()
+        BSPTree.cached(objects, path)
+        load = perf_counter() - start
+    rng = random.Random(seed)
+    eyes = [(rng.uniform(-radius, radius), rng.uniform(-radius, radius), rng.uniform(0, 2)) for _ in range(positions)]
+    start = perf_counter()
+    for eye in eyes:
+        tree.order(eye)
+    order_time = perf_counter() - start
+    # painter's algorithm by the distance of the face centers, not always a correct order
+    centers = np.add.reduceat(vertices, offsets[:-1]) / np.diff(offsets)[:, None]
+    start = perf_counter()
+    for eye in eyes:
+        np.argsort(-((centers - eye) ** 2).sum(axis=1))
+    sort_time = perf_counter() - start
+    return {
+        "cubes": cubes,
+        "faces": len(offsets) - 1,
+        "fragments": tree.fragment_count,
+        "nodes": len(tree.planes),
+        "build_ms": 1000 * build,
+        "cached_load_ms": 1000 * load,
+        "bsp_order_ms": 1000 * order_time / positions,
+        "depth_sort_ms": 1000 * sort_time / positions
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps([run(cubes, args.positions, args.seed) for cubes in args.cubes], indent=2))
+
+if __name__ == "__main__":
+    main()
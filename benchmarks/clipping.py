@@ -0,0 +1,86 @@
+"""
+checks the batch polygon clipper against WorldPolygon.clipped and
+WindowPolygon.clipped on random polygons and compares their speed
+exits with a non zero status if any polygon differs
+
+python -m benchmarks.clipping --polygons 5000
+"""
+import argparse
+import json
+import sys
+from math import pi
+from time import perf_counter
+import numpy as np
+from core.clipping import PackedPolygons, clip_polygons, window_planes, depth_planes
+from core.world import WorldPoint, WorldPolygon
+from core.window import WindowPoint, WindowPolygon
+
+def random_polygons(rng, count, dimension, spread):
+    """
+    convex polygons with 3 to 8 vertices around random centers
+    """
+    polygons = []
+    for _ in range(count):
+        n = int(rng.integers(3, 9))
+        center = rng.uniform(-spread, spread, dimension)
+        angles = np.sort(rng.uniform(0, 2 * pi, n))
+        radius = rng.uniform(0.1, spread)
+        vertices = np.tile(center, (n, 1))
+        vertices[:, 0] += radius * np.cos(angles)
+        vertices[:, 1] += radius * np.sin(angles)
+        polygons.append(vertices)
+    return polygons
+
+def compare(reference, packed):
+    reference = [r for r in reference if r is not None]
+    if len(reference) != len(packed):
+        return False
+    for r, p in zip(reference, packed):
+        if not np.allclose([tuple(v) for v in r.vertices], p):
+            return False
+    return True
+
+def check(name, polygons, make, dimension, planes, clip):
+    objects = [make(p) for p in polygons]
+    start = perf_counter()
+    reference = [clip(o) for o in objects]
+    scalar = perf_counter() - start
+    packed = PackedPolygons.from_polygons(objects, dimension)
+    start = perf_counter()
+    result = clip_polygons(packed, planes)
+    batch = perf_counter() - start
+    return {
+        f"{name}_matches": compare(reference, result),
+        f"{name}_scalar_ms": 1000 * scalar,
+        f"{name}_batch_ms": 1000 * batch
+    }
+
+def run(count, seed):
+    rng = np.random.default_rng(seed)
+    window = (-1, -0.75, 1, 0.75)
+    near, far = 1, 5
+    result = {"polygons": count}
+    result.update(check(
+        "window", random_polygons(rng, count, 2, 1.5),
+        lambda p: WindowPolygon([WindowPoint(*v) for v in p.tolist()]), 2,
+        window_planes(*window), lambda o: o.clipped(*window)
+    ))
+    result.update(check(
+        "world", [p + (3, 0, 0) for p in random_polygons(rng, count, 3, 3)],
+        lambda p: WorldPolygon([WorldPoint(*v) for v in p.tolist()]), 3,
+        depth_planes(near, far), lambda o: o.clipped(near, far)
+    ))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--polygons", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = run(args.polygons, args.seed)
+    print(json.dumps(result, indent=2))
+    if not (result["window_matches"] and result["world_matches"]):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+collision benchmark
+builds a SpatialGrid over scenes of growing numbers of cubes and measures
+player box sweeps per second against it and against testing every cube
+the cell size is chosen from the cubes unless given
+also times adding objects one at a time to a BVH against rebuilding it for each of them
+
+python -m benchmarks.collision --cubes 1000 10000 100000
+"""
+import argparse
+import json
+import random
+from time import perf_counter
+import numpy as np
+from core.grid import SpatialGrid
+from core.bvh import BVH
+from benchmarks.frames import generate_scene
+from display.player import Player
+
+def brute_force(minimums, maximums, low, high):
+    """
+    indices of all boxes overlapping the box from low to high
+    """
+    return np.nonzero(((minimums < high) & (maximums > low)).all(axis=1))[0]
+
+def run(cubes, queries, seed, cell, inserts=100):
+    # same density of cubes at every scene size
+    radius = (cubes / 10) ** 0.5
+    objects = generate_scene(cubes, radius, seed, instanced=True)
+    start = perf_counter()
+    grid = SpatialGrid(objects, cell)
+    build = perf_counter() - start
+    rng = random.Random(seed)
+    size = np.array(Player.SIZE)
+    boxes = []
+    for _ in range(queries):
+        center = np.array((rng.uniform(-radius, radius), rng.uniform(-radius, radius), rng.uniform(0, 2)))
+        boxes.append((tuple(center - size), tuple(center + size), (rng.uniform(-0.1, 0.1), rng.uniform(-0.1, 0.1), rng.uniform(-0.1, 0.1))))
+    start = perf_counter()
+    hits = sum(any(grid.sweep(low, high, delta)[1]) for low, high, delta in boxes)
+    grid_time = perf_counter() - start
+    minimums = np.array([obj.mesh.minimum for obj in objects])
+    maximums = np.array([obj.mesh.maximum for obj in objects])
+    start = perf_counter()
+    for low, high, delta in boxes:
+        brute_force(minimums, maximums, np.array(low) + np.minimum(delta, 0), np.array(high) + np.maximum(delta, 0))
+    brute_time = perf_counter() - start
+    added = objects[-inserts:]
+    bvh = BVH(objects[:-inserts])
+    start = perf_counter()
+    for obj in added:
+        bvh.insert(obj)
+    insert = (perf_counter() - start) / inserts
+    start = perf_counter()
+    BVH(objects)
+    rebuild = perf_counter() - start
+    return {
+        "cubes": cubes,
+        "cell": grid.cell,
+        "cells": len(grid.cells),
+        "build_ms": 1000 * build,
+        "blocked_fraction": hits / queries,
+        "grid_queries_per_s": queries / grid_time,
+        "brute_force_queries_per_s": queries / brute_time,
+        "bvh_insert_ms": 1000 * insert,
+        "bvh_rebuild_ms": 1000 * rebuild
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--cell", type=float, default=None, help="cell size, chosen from the cubes by default")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps([run(cubes, args.queries, args.seed, args.cell) for cubes in args.cubes], indent=2))
+
+if __name__ == "__main__":
+    main()
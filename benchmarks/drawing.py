@@ -0,0 +1,48 @@
+"""
+draw stage benchmark
+renders the frame benchmark scene drawing every corner and edge on its own
+and with corner sprites and polylines, and prints the pygame draw calls
+and the time of the draw stage per frame as JSON
+
+python -m benchmarks.drawing --cubes 1000 --frames 100
+"""
+import argparse
+import json
+import os
+from benchmarks.frames import generate_scene, camera_pose, percentiles
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def run(cubes, frames, width, height, radius, seed, sprites):
+    from display.app import App
+    app = App(objects=generate_scene(cubes, radius, seed), headless=True, size=(width, height), sprites=sprites)
+    times = []
+    calls = 0
+    for frame in range(frames):
+        app.camera.position, app.camera.rotation = camera_pose(frame, frames, radius)
+        app.profiler.begin_frame()
+        app.draw_scene()
+        app.profiler.end_frame()
+        # only the draw stage differs between the two
+        times.append(app.profiler.times["rasterization"])
+        calls += app.draw_calls
+    return {"draw_calls": calls / frames, **percentiles(times)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--radius", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    result = {"cubes": args.cubes}
+    for name, sprites in (("separate", False), ("batched", True)):
+        result[name] = run(args.cubes, args.frames, args.width, args.height, args.radius, args.seed, sprites)
+    result["call_ratio"] = result["separate"]["draw_calls"] / result["batched"]["draw_calls"]
+    result["speedup"] = result["separate"]["p50_ms"] / result["batched"]["p50_ms"]
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
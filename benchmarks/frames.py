@@ -0,0 +1,118 @@
+"""
+headless frame benchmark
+renders a generated scene of cubes along a scripted camera path
+and prints per frame timing percentiles and throughput as JSON
+
+python -m benchmarks.frames --cubes 1000 --frames 300
+"""
+import argparse
+import json
+import os
+import random
+from math import pi, sin, cos, atan2
+from time import perf_counter
+import numpy as np
+from core.cube import Cube, unit_cube
+from core.instancing import Instances
+from core.world import WorldPoint
+from core.rotation import Rotation
+
+# keep stdout valid JSON
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def generate_scene(cubes, radius, seed=0, instanced=False):
+    """
+    cubes of random size scattered over a disk of the given radius
+    instanced cubes share one template mesh, the scene is the same
+    """
+    rng = random.Random(seed)
+    scene = []
+    for _ in range(cubes):
+        r = radius * rng.random() ** 0.5
+        t = rng.uniform(0, 2 * pi)
+        scene.append((r * cos(t), r * sin(t), rng.uniform(-1, 2), rng.uniform(0.2, 1)))
+    if instanced:
+        scene = np.array(scene).reshape(-1, 4)
+        return Instances(unit_cube(), scene[:, :3], scene[:, 3]).objects()
+    return [Cube(*cube) for cube in scene]
+
+def camera_pose(frame, frames, radius):
+    """
+    position and rotation of the camera at the given frame
+    the camera circles the scene once looking slightly inwards and bobbing up and down
+    """
+    t = 2 * pi * frame / frames
+    position = WorldPoint(radius * cos(t), radius * sin(t), 0.5 + 0.3 * sin(3 * t))
+    a = atan2(-position.y, -position.x) + 0.4 * sin(2 * t)
+    return position, Rotation(a, 0.15 * sin(5 * t))
+
+def percentiles(times):
+    """
+    timing summary of a list of durations in seconds
+    """
+    ms = np.array(times) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "max_ms": float(ms.max()),
+        "fps": float(len(ms) / (ms.sum() / 1000))
+    }
+
+def run(cubes, frames, width, height, radius, seed, warmup=5, workers=0, processes=False, backend="draw", instanced=False):
+    from display.app import App
+    from core.parallel import ParallelRenderer
+    parallel = ParallelRenderer(workers, processes) if workers else None
+    app = App(objects=generate_scene(cubes, radius, seed, instanced), headless=True, size=(width, height), parallel=parallel, backend=backend)
+    times = []
+    drawn = 0
+    for frame in range(-warmup, frames):
+        app.camera.position, app.camera.rotation = camera_pose(max(frame, 0), frames, radius)
+        start = perf_counter()
+        app.profiler.begin_frame()
+        app.draw_things()
+        app.profiler.end_frame()
+        if frame >= 0:
+            times.append(perf_counter() - start)
+            drawn += app.drawn
+    fallbacks = parallel.fallbacks if parallel else 0
+    if parallel:
+        parallel.close()
+    return {
+        "cubes": cubes,
+        "frames": frames,
+        "resolution": [width, height],
+        "workers": workers,
+        "backend": backend,
+        "instanced": instanced,
+        "mean_drawn": drawn / frames,
+        "parallel_fallbacks": fallbacks,
+        **percentiles(times),
+        "stages": app.profiler.summary(),
+        "visibility": app.visibility.stats() if app.visibility else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, default=1000)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--radius", type=float, default=20.0, help="radius of the scene and the camera path")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=0, help="render in parallel with this many workers")
+    parser.add_argument("--processes", action="store_true", help="use processes instead of threads")
+    parser.add_argument("--backend", choices=("draw", "raster"), default="draw", help="pygame.draw or the NumPy rasterizer")
+    parser.add_argument("--instanced", action="store_true", help="share one cube mesh between all cubes")
+    parser.add_argument("--output", help="also write the result to this file")
+    args = parser.parse_args()
+    result = run(args.cubes, args.frames, args.width, args.height, args.radius, args.seed, workers=args.workers, processes=args.processes, backend=args.backend, instanced=args.instanced)
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+
+if __name__ == "__main__":
+    main()
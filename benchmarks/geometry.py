@@ -0,0 +1,108 @@
+"""
+memory benchmark of the geometry types
+reports bytes retained per Cube and, for every workload, the time of a frame and
+the allocations it makes measured with tracemalloc: the blocks and bytes still
+allocated at the end of the frame, which holds on to its results, and the peak
+the workloads are rendering a frame through the scalar path, which allocates new
+points for every operation, and through the mesh path, and moving all cube corners
+by a step with new points, with in place augmented assignment and as a WorldPointArray
+
+python -m benchmarks.geometry --cubes 2000
+"""
+import argparse
+import json
+import tracemalloc
+from time import perf_counter
+from core.world import WorldPoint, WorldPointArray
+from benchmarks.frames import generate_scene, camera_pose
+
+def measure(function):
+    """
+    runs function under tracemalloc
+    returns its result, the retained bytes, the peak bytes and the elapsed seconds
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    result = function()
+    elapsed = perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak, elapsed
+
+def allocations(function):
+    """
+    blocks and bytes allocated by function and still alive when it returns, and its peak bytes
+    the result of function is kept alive until the snapshot is taken
+    """
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    tracemalloc.stop()
+    stats = snapshot.statistics("filename")
+    del result
+    return sum(stat.count for stat in stats), sum(stat.size for stat in stats), peak
+
+def scalar_frame(camera, scene):
+    results = []
+    for cube in scene:
+        for face in cube.faces:
+            results.append(camera.render_polygon(face))
+        for edge in cube.edges:
+            results.append(camera.render_line(edge))
+        for corner in cube.corners:
+            results.append(camera.render_point(corner))
+    return results
+
+def mesh_frame(camera, scene):
+    return camera.render_meshes([cube.mesh for cube in scene], (-1, -0.75, 1, 0.75), False)
+
+def translate_new(corners, array, step):
+    for i, corner in enumerate(corners):
+        corners[i] = corner + step
+
+def translate_in_place(corners, array, step):
+    for corner in corners:
+        corner += step
+
+def translate_array(corners, array, step):
+    array += step
+
+def run(cubes, radius, seed):
+    from core.camera import Camera
+    scene, retained, _, build_time = measure(lambda: generate_scene(cubes, radius, seed))
+    camera = Camera()
+    camera.position, camera.rotation = camera_pose(0, 1, radius)
+    camera.view()
+    result = {
+        "cubes": cubes,
+        "bytes_per_cube": retained / cubes,
+        "build_ms": 1000 * build_time
+    }
+    frames = {
+        "scalar": lambda: scalar_frame(camera, scene),
+        "mesh": lambda: mesh_frame(camera, scene)
+    }
+    corners = [WorldPoint(*corner) for cube in scene for corner in cube.corners]
+    array = WorldPointArray.from_points(corners)
+    step = WorldPoint(0.001, 0, 0)
+    for name, translate in (("translate_new", translate_new), ("translate_in_place", translate_in_place), ("translate_array", translate_array)):
+        frames[name] = lambda translate=translate: translate(corners, array, step)
+    for name, frame in frames.items():
+        start = perf_counter()
+        frame()
+        elapsed = perf_counter() - start
+        blocks, size, peak = allocations(frame)
+        result[name] = {"frame_ms": 1000 * elapsed, "allocated_blocks": blocks, "allocated_bytes": size, "peak_bytes": peak}
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, default=2000)
+    parser.add_argument("--radius", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.cubes, args.radius, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
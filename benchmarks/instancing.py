@@ -0,0 +1,51 @@
+"""
+instancing benchmark
+builds the same scene of cubes as separate Cube objects and as Instances
+of one template mesh and compares build time, memory and frame time
+
+python -m benchmarks.instancing --cubes 100000
+"""
+import argparse
+import json
+import os
+import tracemalloc
+from time import perf_counter
+from benchmarks.frames import generate_scene, run
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def build(cubes, radius, seed, instanced):
+    """
+    build time in milliseconds and peak memory in megabytes of the scene
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    scene = generate_scene(cubes, radius, seed, instanced)
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del scene
+    return {"build_ms": 1000 * elapsed, "memory_mb": peak / 2 ** 20}
+
+def compare(cubes, frames, width, height, radius, seed):
+    result = {"cubes": cubes}
+    for name, instanced in (("cubes", False), ("instances", True)):
+        frame = run(cubes, frames, width, height, radius, seed, instanced=instanced)
+        result[name] = {**build(cubes, radius, seed, instanced), "p50_ms": frame["p50_ms"], "p95_ms": frame["p95_ms"]}
+    result["memory_ratio"] = result["cubes"]["memory_mb"] / result["instances"]["memory_mb"]
+    result["build_speedup"] = result["cubes"]["build_ms"] / result["instances"]["build_ms"]
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, default=100000)
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--radius", type=float, default=100.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(compare(args.cubes, args.frames, args.width, args.height, args.radius, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+mesh loading benchmark
+writes an OBJ grid of quads and measures parsing the text,
+the first load that also writes the binary cache and loads from the cache
+
+python -m benchmarks.loader --size 1000
+"""
+import argparse
+import json
+import os
+import tempfile
+from time import perf_counter
+from core.loader import load_mesh, cache_paths
+
+def write_grid(path, size):
+    """
+    size x size quads with (size + 1) ** 2 vertices
+    """
+    with open(path, "w") as f:
+        for i in range(size + 1):
+            f.write("".join(f"v {i} 0 {j}\n" for j in range(size + 1)))
+        for i in range(size):
+            f.write("".join(f"f {i * (size + 1) + j + 1} {i * (size + 1) + j + 2} {(i + 1) * (size + 1) + j + 2} {(i + 1) * (size + 1) + j + 1}\n" for j in range(size)))
+
+def timed(function, *args, **kwargs):
+    start = perf_counter()
+    result = function(*args, **kwargs)
+    return result, 1000 * (perf_counter() - start)
+
+def run(size):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "grid.obj")
+        write_grid(path, size)
+        mesh, parse = timed(load_mesh, path, cache=False)
+        _, first = timed(load_mesh, path)
+        cached, warm = timed(load_mesh, path)
+        assert (cached.vertices == mesh.vertices).all() and (cached.face_indices == mesh.face_indices).all()
+        _, array_paths = cache_paths(path)
+        return {
+            "vertices": len(mesh.vertices),
+            "faces": mesh.face_count,
+            "source_mb": os.path.getsize(path) / 2 ** 20,
+            "cache_mb": sum(os.path.getsize(p) for p in array_paths.values()) / 2 ** 20,
+            "parse_ms": parse,
+            "parse_and_cache_ms": first,
+            "cached_ms": warm,
+            "speedup": parse / warm
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1000, help="quads along each side of the grid")
+    args = parser.parse_args()
+    print(json.dumps(run(args.size), indent=2))
+
+if __name__ == "__main__":
+    main()
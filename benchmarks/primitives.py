@@ -0,0 +1,150 @@
+"""
+microbenchmarks of the scalar geometry primitives
+times every primitive over seeded random inputs that are all visible,
+all culled or straddling the clipping planes and prints nanoseconds per call as JSON
+--save writes the result as a baseline, --baseline compares against one
+and exits with 1 if a primitive got slower than the threshold
+times are compared relative to a plain Python reference loop timed in between,
+so a baseline saved on one machine or under other load still applies
+
+python -m benchmarks.primitives --save benchmarks/baseline.json
+python -m benchmarks.primitives --baseline benchmarks/baseline.json --threshold 0.5
+"""
+import argparse
+import json
+import random
+import sys
+from math import pi
+from time import perf_counter
+from core.world import WorldPoint, WorldLine, WorldPolygon
+from core.window import WindowPoint, WindowLine, WindowPolygon
+from core.camera import Camera
+
+NEAR, FAR = 1, 5
+BOUNDS = (-1, -0.5625, 1, 0.5625)
+
+def world_point(rng, x_range, spread=1.0):
+    return WorldPoint(rng.uniform(*x_range), rng.uniform(-spread, spread), rng.uniform(-spread, spread))
+
+def window_point(rng, x_range, y_range):
+    return WindowPoint(rng.uniform(*x_range), rng.uniform(*y_range))
+
+def x_ranges(near, far):
+    """
+    ranges of x for inputs inside, outside and on both sides of near and far
+    """
+    return {
+        "visible": [(near + 0.1, far - 0.1)],
+        "culled": [(near - 3, near - 0.1)],
+        "straddling": [(near - 2, near - 0.1), (near + 0.1, far - 0.1)]
+    }
+
+def world_lines(rng, case, count):
+    ranges = x_ranges(NEAR, FAR)[case]
+    return [WorldLine(world_point(rng, ranges[0]), world_point(rng, ranges[-1])) for _ in range(count)]
+
+def world_polygons(rng, case, count, size=4):
+    ranges = x_ranges(NEAR, FAR)[case]
+    return [WorldPolygon([world_point(rng, ranges[i % len(ranges)]) for i in range(size)]) for _ in range(count)]
+
+def window_ranges(case):
+    """
+    ranges of x and y for window inputs, straddling ones reach out of the left and top borders
+    """
+    min_x, min_y, max_x, max_y = BOUNDS
+    inside = ((min_x + 0.05, max_x - 0.05), (min_y + 0.05, max_y - 0.05))
+    return {
+        "visible": [inside],
+        "culled": [((max_x + 0.1, max_x + 2), (min_y, max_y))],
+        "straddling": [((min_x - 1, min_x - 0.05), (max_y + 0.05, max_y + 1)), inside]
+    }[case]
+
+def window_lines(rng, case, count):
+    ranges = window_ranges(case)
+    return [WindowLine(window_point(rng, *ranges[0]), window_point(rng, *ranges[-1])) for _ in range(count)]
+
+def window_polygons(rng, case, count, size=4):
+    ranges = window_ranges(case)
+    return [WindowPolygon([window_point(rng, *ranges[i % len(ranges)]) for i in range(size)]) for _ in range(count)]
+
+def workloads(rng, count):
+    """
+    name, case, function and its argument tuples of every benchmark
+    """
+    camera = Camera()
+    camera.view()
+    for case in ("visible", "culled", "straddling"):
+        yield "WorldPolygon.clipped", case, WorldPolygon.clipped, [(p, NEAR, FAR) for p in world_polygons(rng, case, count)]
+        yield "WindowLine.clipped", case, WindowLine.clipped, [(l, *BOUNDS) for l in window_lines(rng, case, count)]
+        yield "WindowPolygon.clipped", case, WindowPolygon.clipped, [(p, *BOUNDS) for p in window_polygons(rng, case, count)]
+        # the camera looks along x, the polygons are in front of, behind or through the near plane
+        yield "Camera.render_polygon", case, camera.render_polygon, [(p,) for p in world_polygons(rng, case, count)]
+    yield "WorldLine.intersection", "straddling", WorldLine.intersection, [(l, NEAR) for l in world_lines(rng, "straddling", count)]
+    points = [world_point(rng, (-10, 10), 10) for _ in range(count)]
+    yield "WorldPoint.rotate_z", "all", WorldPoint.rotate_z, [(p, rng.uniform(-pi, pi)) for p in points]
+    yield "WorldPoint.rotate_y", "all", WorldPoint.rotate_y, [(p, rng.uniform(-pi, pi)) for p in points]
+
+def reference(x, y, z, a):
+    # arithmetic and allocation of about the size of a primitive, independent of the code measured
+    return (x * a - y, y * a + x, z), [x, y, z]
+
+def time_calls(function, arguments, repeats, rng):
+    """
+    best nanoseconds per call over repeats runs through all arguments
+    and the best time of the reference loop over runs interleaved with them
+    """
+    reference_arguments = [(rng.random(), rng.random(), rng.random(), rng.random()) for _ in arguments]
+    best = [float("inf"), float("inf")]
+    for _ in range(repeats):
+        for i, (f, calls) in enumerate(((function, arguments), (reference, reference_arguments))):
+            start = perf_counter()
+            for args in calls:
+                f(*args)
+            best[i] = min(best[i], perf_counter() - start)
+    return 1e9 * best[0] / len(arguments), 1e9 * best[1] / len(arguments)
+
+def run(count, repeats, seed):
+    """
+    nanoseconds per call and the same relative to the reference loop of every benchmark
+    """
+    rng = random.Random(seed)
+    result = {"ns_per_call": {}, "relative": {}}
+    for name, case, function, arguments in workloads(rng, count):
+        ns, reference_ns = time_calls(function, arguments, repeats, rng)
+        result["ns_per_call"][f"{name}/{case}"] = ns
+        result["relative"][f"{name}/{case}"] = ns / reference_ns
+    return result
+
+def regressions(result, baseline, threshold):
+    """
+    benchmarks more than threshold slower than in the baseline relative to the reference, with their ratio
+    """
+    ratios = {name: result[name] / baseline[name] for name in result if name in baseline}
+    return {name: ratio for name, ratio in ratios.items() if ratio > 1 + threshold}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000, help="inputs per benchmark")
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="write the result as a baseline to this file")
+    parser.add_argument("--baseline", help="compare against the baseline in this file")
+    parser.add_argument("--threshold", type=float, default=0.5, help="allowed slowdown, 0.5 is 50%% slower")
+    args = parser.parse_args()
+    result = run(args.count, args.repeats, args.seed)
+    failed = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["relative"]
+        failed = regressions(result["relative"], baseline, args.threshold)
+        result["threshold"] = args.threshold
+        result["regressions"] = failed
+    print(json.dumps(result, indent=2))
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write(json.dumps({key: result[key] for key in ("ns_per_call", "relative")}, indent=2) + "\n")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
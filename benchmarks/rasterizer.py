@@ -0,0 +1,39 @@
+"""
+rasterizer backend benchmark
+renders the frame benchmark scene with growing numbers of cubes
+with pygame.draw and with the NumPy rasterizer and prints both as JSON
+
+python -m benchmarks.rasterizer --cubes 100 1000 5000 --frames 60
+"""
+import argparse
+import json
+import os
+from benchmarks.frames import run
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def compare(cubes, frames, width, height, radius, seed):
+    results = []
+    for count in cubes:
+        row = {"cubes": count}
+        for backend in ("draw", "raster"):
+            result = run(count, frames, width, height, radius, seed, backend=backend)
+            row[backend] = {key: result[key] for key in ("p50_ms", "p95_ms", "fps")}
+            row["primitives"] = result["stages"]["rasterization"]["count"]
+        row["speedup"] = row["draw"]["p50_ms"] / row["raster"]["p50_ms"]
+        results.append(row)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--radius", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(compare(args.cubes, args.frames, args.width, args.height, args.radius, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+scene graph benchmark
+animates a few nodes of a large static scene graph of cubes and measures the time per frame
+of updating their world meshes and refitting the BVH and grid of a headless App,
+compared with rebuilding the cubes and the BVH of the whole scene every frame
+
+python -m benchmarks.scene --cubes 50000 --moving 10 100
+"""
+import argparse
+import json
+import os
+import random
+from math import sin
+from time import perf_counter
+from core.cube import Cube, unit_cube
+from core.bvh import BVH
+from core.rotation import Rotation
+from core.scene import SceneGraph, SceneNode
+from benchmarks.frames import generate_scene
+
+# keep stdout valid JSON
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def build_graph(cubes, radius, seed):
+    """
+    graph of the generated cubes in groups of ten, every group a node with the cubes as children
+    """
+    graph = SceneGraph()
+    template = unit_cube()
+    group = None
+    scene = generate_scene(cubes, radius, seed, instanced=True)[0].instances
+    for i, ((x, y, z), s) in enumerate(zip(scene.positions.tolist(), scene.scales.tolist())):
+        if i % 10 == 0:
+            group = graph.add(SceneNode(position=(x, y, z), name=f"group {i // 10}"))
+        gx, gy, gz = group.position
+        graph.add(SceneNode(template, (x - gx, y - gy, z - gz), scale=s), group)
+    graph.update()
+    return graph
+
+def run(cubes, moving, frames, seed):
+    from display.app import App
+    radius = (cubes / 10) ** 0.5
+    start = perf_counter()
+    graph = build_graph(cubes, radius, seed)
+    build = perf_counter() - start
+    app = App(objects=graph.objects(), headless=True, size=(320, 180))
+    rng = random.Random(seed)
+    groups = rng.sample(graph.root.children, moving)
+    start = perf_counter()
+    for frame in range(frames):
+        for group in groups:
+            group.rotate_to(Rotation(0.05 * frame, 0))
+            x, y, _ = group.position
+            group.move_to((x, y, sin(0.1 * frame)))
+        app.update_objects(graph.update())
+    update = (perf_counter() - start) / frames
+    # the flat list of cubes baked in world coordinates, every cube rebuilt and the BVH with it
+    scene = [obj.mesh for obj in graph.objects()]
+    start = perf_counter()
+    objects = [Cube(*mesh.center.tolist(), float(mesh.maximum[0] - mesh.minimum[0])) for mesh in scene]
+    BVH(objects)
+    rebuild = perf_counter() - start
+    return {
+        "cubes": cubes,
+        "moving_cubes": 10 * moving,
+        "graph_build_ms": 1000 * build,
+        "update_ms": 1000 * update,
+        "rebuild_ms": 1000 * rebuild
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cubes", type=int, default=50000)
+    parser.add_argument("--moving", type=int, nargs="+", default=[1, 10, 100], help="groups of ten cubes animated every frame")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps([run(args.cubes, moving, args.frames, args.seed) for moving in args.moving], indent=2))
+
+if __name__ == "__main__":
+    main()
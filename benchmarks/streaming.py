@@ -0,0 +1,76 @@
+"""
+world streaming benchmark
+flies the camera of a headless App in a straight line through an endless generated world
+streamed by a WorldStreamer and prints frame timing, the time spent swapping tiles in on the
+render thread and the memory and object counts, which stay bounded however far it flies
+
+python -m benchmarks.streaming --frames 600 --speed 0.5
+"""
+import argparse
+import json
+import os
+from time import perf_counter
+from core.world import WorldPoint
+from core.rotation import Rotation
+from core.streaming import WorldStreamer, generated_tiles
+from benchmarks.frames import percentiles
+
+# keep stdout valid JSON
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def run(frames, speed, cubes, tile_size, distance, budget, width, height, seed):
+    from display.app import App
+    streamer = WorldStreamer(generated_tiles(cubes, seed), tile_size, distance, budget)
+    app = App(headless=True, size=(width, height), streamer=streamer)
+    app.camera.rotation = Rotation(0, 0)
+    app.camera.position = WorldPoint(0, 0, 0.5)
+    # the first tiles are loaded before the first frame
+    streamer.update(app.camera.position, block=True)
+    app.set_objects(streamer.objects())
+    times = []
+    swaps = []
+    objects = memory = 0
+    for frame in range(frames):
+        app.camera.position = WorldPoint(frame * speed, 0, 0.5)
+        start = perf_counter()
+        app.profiler.begin_frame()
+        swap = perf_counter()
+        app.stream()
+        swaps.append(perf_counter() - swap)
+        app.draw_things()
+        app.profiler.end_frame()
+        times.append(perf_counter() - start)
+        objects = max(objects, len(app.objects))
+        memory = max(memory, streamer.memory)
+    stats = streamer.stats()
+    streamer.close()
+    return {
+        "frames": frames,
+        "distance_flown": frames * speed,
+        "max_objects": objects,
+        "max_memory_mb": memory / 2 ** 20,
+        "budget_mb": budget / 2 ** 20,
+        "tiles_loaded": stats["tiles_loaded"],
+        "tiles_evicted": stats["tiles_evicted"],
+        "tiles_failed": stats["tiles_failed"],
+        "stream_p99_ms": float(percentiles(swaps)["p99_ms"]),
+        "stream_max_ms": float(percentiles(swaps)["max_ms"]),
+        **percentiles(times)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--speed", type=float, default=0.5, help="units flown per frame")
+    parser.add_argument("--cubes", type=int, default=20, help="cubes per tile")
+    parser.add_argument("--tile-size", type=float, default=8.0)
+    parser.add_argument("--distance", type=float, default=8.0)
+    parser.add_argument("--budget", type=float, default=0.1, help="memory budget in MB")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(run(args.frames, args.speed, args.cubes, args.tile_size, args.distance, int(args.budget * 2 ** 20), args.width, args.height, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+voxel terrain benchmark
+builds flat terrain out of chunks, renders frames along a camera path
+over it and measures rebuilding a chunk after a cell changes
+
+python -m benchmarks.voxels --size 256 --frames 200
+"""
+import argparse
+import json
+import os
+from math import pi, sin, cos
+from time import perf_counter
+from core.voxel import VoxelWorld
+from core.world import WorldPoint
+from core.rotation import Rotation
+from benchmarks.frames import percentiles
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def run(size, depth, frames, width, height):
+    from display.app import App
+    start = perf_counter()
+    world = VoxelWorld()
+    world.fill((-size // 2, -size // 2, -depth), (size // 2, size // 2, 0))
+    objects = world.objects()
+    build = perf_counter() - start
+    app = App(objects=objects, headless=True, size=(width, height))
+    times = []
+    drawn = 0
+    for frame in range(frames):
+        t = 2 * pi * frame / frames
+        app.camera.position = WorldPoint(0.3 * size * cos(t), 0.3 * size * sin(t), 1.5)
+        app.camera.rotation = Rotation(t + pi / 2, -0.3)
+        start = perf_counter()
+        app.draw_things()
+        times.append(perf_counter() - start)
+        drawn += app.drawn
+    start = perf_counter()
+    world.set(0, 0, 0)
+    rebuilt = [chunk for chunk in world.chunks.values() if chunk.dirty]
+    for chunk in rebuilt:
+        chunk.mesh
+    rebuild = perf_counter() - start
+    return {
+        "size": size,
+        "chunks": len(objects),
+        "faces": sum(obj.mesh.face_count for obj in objects),
+        "build_ms": 1000 * build,
+        "mean_drawn": drawn / frames,
+        "rebuilt_chunks": len(rebuilt),
+        "rebuild_ms": 1000 * rebuild,
+        **percentiles(times)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    args = parser.parse_args()
+    print(json.dumps(run(args.size, args.depth, args.frames, args.width, args.height), indent=2))
+
+if __name__ == "__main__":
+    main()
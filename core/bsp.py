@@ -0,0 +1,382 @@
+import hashlib
+import numpy as np
+from core.clipping import PackedPolygons, clip_polygons, clip_lines, clip_points, frustum_planes
+from core.screen import ScreenGeometry
+
+class BSPTree:
+    """
+    binary space partitioning tree of static polygons in the world
+    every node splits space with the plane of one of the polygons, polygons crossing
+    a plane are cut into fragments, so walking the tree from any position gives the
+    fragments back to front in linear time without sorting
+    fragments are stored packed, fragment i is vertices[offsets[i]:offsets[i + 1]]
+    boundary tells for every fragment vertex whether the edge starting at it is part of the
+    outline of the original polygon and corner whether the vertex is one of its vertices
+    nodes are arrays, node k has the plane planes[k], the children front[k] and back[k],
+    -1 for none, and the fragments in its plane first[k]:first[k + 1]
+    """
+    EPSILON = 1e-9
+    # number of polygons tried as the splitter of a node and the cost of a split in balance
+    SAMPLE = 16
+    SPLIT_COST = 8
+
+    def __init__(self, vertices, offsets, closed=None, sources=None):
+        """
+        builds the tree from polygons given as packed world coordinates
+        closed tells for every polygon whether it can be culled when seen from behind
+        sources is stored for every fragment, the index of the polygon by default
+        """
+        vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        offsets = np.asarray(offsets, dtype=np.int64)
+        count = len(offsets) - 1
+        closed = np.ones(count, dtype=bool) if closed is None else np.asarray(closed, dtype=bool)
+        sources = np.arange(count) if sources is None else np.asarray(sources, dtype=np.int64)
+        self.key = BSPTree.geometry_key(vertices, offsets, closed, sources)
+        polygons = []
+        for i in range(count):
+            points = vertices[offsets[i]:offsets[i + 1]]
+            normal = newell_normal(points)
+            if len(points) < 3 or not normal.any():
+                continue
+            n = len(points)
+            polygons.append((points, np.ones(n, dtype=bool), np.ones(n, dtype=bool), normal, bool(closed[i]), int(sources[i])))
+        self.build(polygons)
+
+    def __repr__(self):
+        return f"BSPTree(nodes: {len(self.planes)}, fragments: {self.fragment_count})"
+
+    @classmethod
+    def from_objects(cls, objects):
+        """
+        tree of the faces of the meshes of static objects, sources are the object indices
+        """
+        return cls(*object_polygons(objects))
+
+    @classmethod
+    def from_polygons(cls, polygons, closed=True):
+        """
+        tree of WorldPolygon objects
+        """
+        packed = PackedPolygons.from_polygons(polygons, 3)
+        return cls(packed.vertices, packed.offsets, np.full(len(packed), closed))
+
+    @staticmethod
+    def geometry_key(vertices, offsets, closed, sources):
+        """
+        hash of the input geometry, a saved tree is only used for the same input
+        """
+        digest = hashlib.sha1()
+        for array in (vertices, offsets, closed, sources):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def build(self, polygons):
+        """
+        splits every set of polygons with the best plane of a sample of its polygons,
+        the others go to the front, the back or both
+        """
+        planes, front, back, first = [], [], [], [0]
+        fragments = []
+        # (polygons, parent node, whether it is the front child)
+        stack = [(polygons, -1, True)] if polygons else []
+        while stack:
+            polygons, parent, is_front = stack.pop()
+            node = len(planes)
+            if parent >= 0:
+                (front if is_front else back)[parent] = node
+            splitter, normal, d, distances, sides = choose_splitter(polygons)
+            planes.append((*normal, d))
+            front.append(-1)
+            back.append(-1)
+            # the splitter is in its own plane even if it is not exactly flat
+            fragments.append(polygons[splitter])
+            in_front, behind = [], []
+            starts = np.cumsum([0] + [len(polygon[0]) for polygon in polygons])
+            for i, polygon in enumerate(polygons):
+                if i == splitter:
+                    continue
+                side = sides[i]
+                if side == ON:
+                    fragments.append(polygon)
+                elif side == FRONT:
+                    in_front.append(polygon)
+                elif side == BACK:
+                    behind.append(polygon)
+                else:
+                    a, b = split(polygon, distances[starts[i]:starts[i + 1]])
+                    in_front.append(a)
+                    behind.append(b)
+            first.append(len(fragments))
+            if behind:
+                stack.append((behind, node, False))
+            if in_front:
+                stack.append((in_front, node, True))
+        self.planes = np.array(planes, dtype=float).reshape(-1, 4)
+        self.front = np.array(front, dtype=np.int64)
+        self.back = np.array(back, dtype=np.int64)
+        self.first = np.array(first, dtype=np.int64)
+        sizes = [len(fragment[0]) for fragment in fragments]
+        self.offsets = np.concatenate(([0], np.cumsum(sizes, dtype=np.int64)))
+        self.vertices = np.concatenate([fragment[0] for fragment in fragments] + [np.zeros((0, 3))])
+        self.boundary = np.concatenate([fragment[1] for fragment in fragments] + [np.zeros(0, dtype=bool)])
+        self.corner = np.concatenate([fragment[2] for fragment in fragments] + [np.zeros(0, dtype=bool)])
+        self.normals = np.array([fragment[3] for fragment in fragments], dtype=float).reshape(-1, 3)
+        self.closed = np.array([fragment[4] for fragment in fragments], dtype=bool)
+        self.sources = np.array([fragment[5] for fragment in fragments], dtype=np.int64)
+        self.update_edges()
+
+    def update_edges(self):
+        """
+        outline edges and corners of every fragment as vertex indices grouped by fragment
+        and the centers of the fragments
+        """
+        n = len(self.vertices)
+        sizes = np.diff(self.offsets)
+        following = np.arange(1, n + 1)
+        following[self.offsets[1:][sizes > 0] - 1] = self.offsets[:-1][sizes > 0]
+        fragment = np.repeat(np.arange(self.fragment_count), sizes)
+        edges = np.nonzero(self.boundary)[0]
+        self.edges = np.column_stack((edges, following[edges])).reshape(-1, 2)
+        self.edge_offsets = np.searchsorted(fragment[edges], np.arange(self.fragment_count + 1))
+        self.corners = np.nonzero(self.corner)[0]
+        self.corner_offsets = np.searchsorted(fragment[self.corners], np.arange(self.fragment_count + 1))
+        self.centers = np.add.reduceat(self.vertices, self.offsets[:-1]) / sizes[:, None] if self.fragment_count else np.zeros((0, 3))
+
+    @property
+    def fragment_count(self):
+        return len(self.offsets) - 1
+
+    def order(self, position, cull_back_faces=True):
+        """
+        indices of the fragments from the farthest to the nearest seen from position
+        fragments of closed polygons seen from behind are left out unless cull_back_faces is False
+        """
+        if not len(self.planes):
+            return np.zeros(0, dtype=np.int64)
+        eye = np.array(tuple(position), dtype=float)
+        sides = (self.planes[:, :3] @ eye + self.planes[:, 3]).tolist()
+        front, back, first = self.front.tolist(), self.back.tolist(), self.first.tolist()
+        ranges = []
+        # a node is pushed as ~node after its far side, its own fragments come next
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            if node < 0:
+                ranges.append(~node)
+                continue
+            near, far = (front[node], back[node]) if sides[node] > 0 else (back[node], front[node])
+            if near >= 0:
+                stack.append(near)
+            stack.append(~node)
+            if far >= 0:
+                stack.append(far)
+        nodes = np.array(ranges, dtype=np.int64)
+        starts, ends = self.first[nodes], self.first[nodes + 1]
+        counts = ends - starts
+        order = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        if cull_back_faces:
+            facing = ((eye - self.vertices[self.offsets[order]]) * self.normals[order]).sum(axis=1) > 0
+            order = order[facing | ~self.closed[order]]
+        return order
+
+    def depths(self, position, order):
+        """
+        distances from position to the centers of the fragments with the given indices
+        """
+        return np.linalg.norm(self.centers[order] - tuple(position), axis=1)
+
+    def render(self, camera, bounds, cull_back_faces=True, profiler=None, order=None):
+        """
+        ScreenGeometry of the fragments back to front, every fragment is its own object
+        with its part of the outline and the corners of the original polygon, so drawing
+        the objects in order paints nearer fragments and their outlines over farther ones
+        order is the result of order for the camera position if it is already known
+        returns the geometry and the number of objects in it
+        """
+        if order is None:
+            order = self.order(camera.position, cull_back_faces)
+        rank = np.empty(self.fragment_count, dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        relative = camera.relative_positions(self.vertices)
+        k = camera.projection
+        homogeneous = np.column_stack((-k * relative[:, 1], k * relative[:, 2], relative[:, 0]))
+        if profiler:
+            profiler.mark("transform", len(relative))
+
+        faces = PackedPolygons(homogeneous, self.offsets).take(order)
+        edges = self.edges[take_ranges(self.edge_offsets, order)]
+        edge_objects = np.repeat(np.arange(len(order)), np.diff(self.edge_offsets)[order])
+        corners = self.corners[take_ranges(self.corner_offsets, order)]
+        corner_objects = np.repeat(np.arange(len(order)), np.diff(self.corner_offsets)[order])
+
+        planes = frustum_planes(*camera.clipping_planes, *bounds)
+        polygons = clip_polygons(faces, planes)
+        lines, line_sources = clip_lines(homogeneous[edges].reshape(-1, 2, 3), planes)
+        kept = clip_points(homogeneous[corners], planes)
+        if profiler:
+            profiler.mark("clip", len(faces) + len(edges) + len(corners))
+
+        polygons.vertices = camera.divide(polygons.vertices)
+        lines = camera.divide(lines.reshape(-1, 3)).reshape(-1, 2, 3)
+        points = camera.divide(homogeneous[corners[kept]])
+        if profiler:
+            profiler.mark("perspective", len(polygons.vertices) + 2 * len(lines) + len(points))
+        screen = ScreenGeometry(polygons, rank[polygons.sources], lines, edge_objects[line_sources], points, corner_objects[kept])
+        return screen, len(order)
+
+    def save(self, path):
+        """
+        writes the tree to an .npz file
+        """
+        with open(path, "wb") as f:
+            np.savez(f, key=np.array(self.key), planes=self.planes, front=self.front, back=self.back, first=self.first,
+                     offsets=self.offsets, vertices=self.vertices, boundary=self.boundary, corner=self.corner,
+                     normals=self.normals, closed=self.closed, sources=self.sources)
+
+    @classmethod
+    def load(cls, path):
+        """
+        reads a tree written by save
+        """
+        tree = cls.__new__(cls)
+        with np.load(path) as data:
+            tree.key = str(data["key"])
+            for name in ("planes", "front", "back", "first", "offsets", "vertices", "boundary", "corner", "normals", "closed", "sources"):
+                setattr(tree, name, data[name])
+        tree.update_edges()
+        return tree
+
+    @classmethod
+    def cached(cls, objects, path):
+        """
+        tree of the static objects, loaded from path if it was saved for the same geometry
+        and built and saved there otherwise
+        """
+        polygons = object_polygons(objects)
+        try:
+            tree = cls.load(path)
+            if tree.key == cls.geometry_key(*polygons):
+                return tree
+        except (OSError, ValueError, KeyError):
+            pass
+        tree = cls(*polygons)
+        tree.save(path)
+        return tree
+
+def painter_order(fragment_depths, object_depths):
+    """
+    drawing order of fragments in back to front order with their depths and of objects with theirs
+    fragments are 0 to len(fragment_depths) - 1 and objects come after them, every object
+    is drawn after all fragments farther away than it and objects among themselves far to near
+    """
+    fragment_depths = np.asarray(fragment_depths, dtype=float)
+    object_depths = np.asarray(object_depths, dtype=float)
+    # farthest depth of the fragments from every one on, it never grows
+    farthest = np.maximum.accumulate(fragment_depths[::-1])[::-1] if len(fragment_depths) else fragment_depths
+    # number of fragments up to the last one farther away than the object
+    positions = np.searchsorted(-farthest, -object_depths, side="left")
+    keys = np.concatenate((2 * np.arange(len(fragment_depths)) + 1, 2 * positions))
+    # objects with the same key stay far to near
+    by_depth = np.argsort(-object_depths, kind="stable")
+    candidates = np.concatenate((np.arange(len(fragment_depths)), len(fragment_depths) + by_depth))
+    return candidates[np.argsort(keys[candidates], kind="stable")]
+
+# sides of a polygon relative to a plane
+ON, FRONT, BACK, SPANNING = 0, 1, 2, 3
+
+def classify(points, starts, normal, d):
+    """
+    signed distances of the packed points of polygons to a plane and the side of every polygon
+    """
+    eps = BSPTree.EPSILON
+    distances = points @ normal + d
+    low = np.minimum.reduceat(distances, starts[:-1])
+    high = np.maximum.reduceat(distances, starts[:-1])
+    sides = np.full(len(low), SPANNING)
+    sides[low >= -eps] = FRONT
+    sides[high <= eps] = BACK
+    sides[(low >= -eps) & (high <= eps)] = ON
+    return distances, sides
+
+def choose_splitter(polygons):
+    """
+    index of the polygon of the best plane among a sample of BSPTree.SAMPLE of them, its plane,
+    the distances of all points to it and the side of every polygon
+    a plane costs SPLIT_COST for every polygon it splits and one for every polygon
+    the front and the back get out of balance
+    """
+    points = np.concatenate([polygon[0] for polygon in polygons])
+    starts = np.cumsum([0] + [len(polygon[0]) for polygon in polygons])
+    candidates = np.unique(np.linspace(0, len(polygons) - 1, min(len(polygons), BSPTree.SAMPLE)).astype(np.int64)).tolist()
+    best = None
+    for i in candidates:
+        normal = polygons[i][3]
+        d = -float(normal @ polygons[i][0][0])
+        distances, sides = classify(points, starts, normal, d)
+        counts = np.bincount(sides, minlength=4)
+        cost = BSPTree.SPLIT_COST * counts[SPANNING] + abs(int(counts[FRONT]) - int(counts[BACK]))
+        if best is None or cost < best[0]:
+            best = (cost, i, normal, d, distances, sides)
+        if counts[SPANNING] == 0 and abs(int(counts[FRONT]) - int(counts[BACK])) <= 1:
+            break
+    return best[1:]
+
+def object_polygons(objects):
+    """
+    packed world coordinates, closed flags and object indices of the faces of the meshes of objects
+    """
+    meshes = [obj.mesh for obj in objects]
+    vertices = np.concatenate([mesh.vertices[mesh.face_indices] for mesh in meshes] + [np.zeros((0, 3))])
+    sizes = np.concatenate([np.diff(mesh.face_offsets) for mesh in meshes] + [np.zeros(0, dtype=np.int64)])
+    closed = np.concatenate([np.full(mesh.face_count, mesh.closed) for mesh in meshes] + [np.zeros(0, dtype=bool)])
+    sources = np.repeat(np.arange(len(meshes)), [mesh.face_count for mesh in meshes])
+    return vertices, np.concatenate(([0], np.cumsum(sizes))), closed, sources
+
+def take_ranges(offsets, indices):
+    """
+    positions offsets[i]:offsets[i + 1] of all indices one after the other
+    """
+    starts, ends = offsets[indices], offsets[indices + 1]
+    counts = ends - starts
+    return np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+def newell_normal(points):
+    """
+    unit normal of a polygon from its winding, zero for degenerate polygons
+    """
+    following = np.roll(points, -1, axis=0)
+    normal = np.array([
+        ((points[:, 1] - following[:, 1]) * (points[:, 2] + following[:, 2])).sum(),
+        ((points[:, 2] - following[:, 2]) * (points[:, 0] + following[:, 0])).sum(),
+        ((points[:, 0] - following[:, 0]) * (points[:, 1] + following[:, 1])).sum()
+    ])
+    length = np.linalg.norm(normal)
+    return normal / length if length > 0 else normal
+
+def split(polygon, distances):
+    """
+    cuts a polygon crossing a plane into its front and back parts
+    vertices on the plane go to both, the cut edge is not part of the outline
+    """
+    points, boundary, corner, normal, closed, source = polygon
+    eps = BSPTree.EPSILON
+    side = np.where(distances > eps, 1, np.where(distances < -eps, -1, 0)).tolist()
+    parts = {1: ([], [], []), -1: ([], [], [])}
+    n = len(points)
+    for i in range(n):
+        j = (i + 1) % n
+        si, sj = side[i], side[j]
+        for s in (1, -1):
+            part_points, part_boundary, part_corner = parts[s]
+            if si == s or si == 0:
+                part_points.append(points[i])
+                # from a vertex on the plane the part goes on along the cut if the next vertex is on the other side
+                part_boundary.append(bool(boundary[i]) and (si == s or sj != -s))
+                part_corner.append(bool(corner[i]))
+            if si * sj < 0:
+                t = distances[i] / (distances[i] - distances[j])
+                part_points.append(points[i] + t * (points[j] - points[i]))
+                # entering this side the edge follows the original edge, leaving it follows the cut
+                part_boundary.append(bool(boundary[i]) and sj == s)
+                part_corner.append(False)
+    return tuple((np.array(p), np.array(b), np.array(c), normal, closed, source) for p, b, c in (parts[1], parts[-1]))
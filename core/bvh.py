@@ -0,0 +1,256 @@
+import numpy as np
+from core.frustum import Frustum
+
+class BVHNode:
+    """
+    node of a bounding volume hierarchy
+    objects of the subtree are BVH.objects[start:end] and the ones at the indices in inserted
+    center and radius describe the bounding sphere of the node's box
+    children is empty for leaves, parent is None for the root
+    """
+    def __init__(self, minimum, maximum, start, end, children):
+        self.fit(minimum, maximum)
+        self.start = start
+        self.end = end
+        self.inserted = []
+        self.children = children
+        self.parent = None
+        for child in children:
+            child.parent = self
+
+    def fit(self, minimum, maximum):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.center = tuple(0.5 * (minimum + maximum))
+        self.radius = 0.5 * float(np.linalg.norm(maximum - minimum))
+
+    @property
+    def count(self):
+        return self.end - self.start + len(self.inserted)
+
+    def indices(self):
+        return list(range(self.start, self.end)) + self.inserted
+
+class BVH:
+    """
+    bounding volume hierarchy over objects having a mesh
+    leaves hold at most leaf_size objects
+    objects that moved can be refitted without rebuilding, the tree keeps its
+    structure and only the boxes on the way from their leaves to the root grow or shrink
+    objects can be inserted one at a time into the leaf whose box grows the least,
+    the tree is only rebuilt once more than half of its objects were inserted that way
+    """
+    def __init__(self, objects, leaf_size=8):
+        self.leaf_size = leaf_size
+        objects = list(objects)
+        self.objects = []
+        self.order = []
+        self.root = None
+        self.slots = {}
+        self.leaves = []
+        if objects:
+            minimums = np.array([obj.mesh.minimum for obj in objects])
+            maximums = np.array([obj.mesh.maximum for obj in objects])
+            order = self.build_order(minimums, maximums)
+            self.order = order.tolist()
+            self.objects = [objects[i] for i in order]
+            self.minimums = minimums[order]
+            self.maximums = maximums[order]
+            self.built = len(self.objects)
+            self.centers = [tuple(c) for c in 0.5 * (self.minimums + self.maximums)]
+            self.radii = [obj.mesh.radius for obj in self.objects]
+            self.slots = {obj: i for i, obj in enumerate(self.objects)}
+            self.leaves = [None] * len(self.objects)
+            self.root = self.build(0, len(self.objects))
+
+    def __repr__(self):
+        return f"BVH(objects: {len(self.objects)}, leaf_size: {self.leaf_size})"
+
+    def __len__(self):
+        return len(self.objects)
+
+    @classmethod
+    def merge(cls, trees, leaf_size=8):
+        """
+        BVH over the objects of trees one after the other, like a BVH of all of them
+        the nodes of every tree are copied with their objects moved and the object arrays
+        are concatenated, which is still linear in the objects, but none of their boxes
+        are partitioned or reduced again, only the nodes above the roots are new
+        """
+        bvh = cls([], leaf_size)
+        trees = [tree for tree in trees if tree.root]
+        if not trees:
+            return bvh
+        offsets = np.cumsum([0] + [len(tree) for tree in trees[:-1]]).tolist()
+        bvh.minimums, bvh.maximums = [], []
+        bvh.centers, bvh.radii = [], []
+        bvh.root = bvh.join(list(zip(trees, offsets)))
+        bvh.minimums = np.concatenate(bvh.minimums)
+        bvh.maximums = np.concatenate(bvh.maximums)
+        bvh.built = len(bvh.objects)
+        bvh.slots = {obj: i for i, obj in enumerate(bvh.objects)}
+        return bvh
+
+    def join(self, trees):
+        """
+        nodes above the roots of trees, pairs of a tree and the original index of its first object
+        the roots are split at the median of the longest axis of their centers
+        and the objects of every tree are appended when its root is reached
+        """
+        if len(trees) == 1:
+            tree, offset = trees[0]
+            count = len(tree)
+            base = len(self.objects)
+            self.objects.extend(tree.objects)
+            self.order.extend(offset + i for i in tree.order)
+            self.minimums.append(tree.minimums[:count])
+            self.maximums.append(tree.maximums[:count])
+            self.centers.extend(tree.centers)
+            self.radii.extend(tree.radii)
+            self.leaves.extend([None] * count)
+            return self.copy(tree.root, base)
+        centers = np.array([tree.root.center for tree, _ in trees])
+        axis = np.argmax(centers.max(axis=0) - centers.min(axis=0))
+        trees = [trees[i] for i in np.argsort(centers[:, axis], kind="stable")]
+        middle = len(trees) // 2
+        start = len(self.objects)
+        children = [self.join(trees[:middle]), self.join(trees[middle:])]
+        minimum = np.minimum(children[0].minimum, children[1].minimum)
+        maximum = np.maximum(children[0].maximum, children[1].maximum)
+        return BVHNode(minimum, maximum, start, len(self.objects), children)
+
+    def copy(self, node, base):
+        """
+        copy of the subtree of node with its objects moved by base
+        """
+        copy = BVHNode(node.minimum, node.maximum, node.start + base, node.end + base, [self.copy(child, base) for child in node.children])
+        copy.inserted = [i + base for i in node.inserted]
+        if not copy.children:
+            for i in copy.indices():
+                self.leaves[i] = copy
+        return copy
+
+    def build_order(self, minimums, maximums):
+        """
+        orders objects so that every node covers a contiguous range
+        splits at the median of the longest axis
+        """
+        centers = 0.5 * (minimums + maximums)
+        order = np.arange(len(centers))
+        stack = [(0, len(order))]
+        while stack:
+            start, end = stack.pop()
+            if end - start <= self.leaf_size:
+                continue
+            part = order[start:end]
+            axis = np.argmax(maximums[part].max(axis=0) - minimums[part].min(axis=0))
+            middle = (end - start) // 2
+            order[start:end] = part[np.argpartition(centers[part, axis], middle)]
+            stack.append((start, start + middle))
+            stack.append((start + middle, end))
+        return order
+
+    def build(self, start, end):
+        minimum = self.minimums[start:end].min(axis=0)
+        maximum = self.maximums[start:end].max(axis=0)
+        if end - start <= self.leaf_size:
+            leaf = BVHNode(minimum, maximum, start, end, [])
+            self.leaves[start:end] = [leaf] * (end - start)
+            return leaf
+        middle = start + (end - start) // 2
+        return BVHNode(minimum, maximum, start, end, [self.build(start, middle), self.build(middle, end)])
+
+    def insert(self, obj):
+        """
+        adds obj to the tree, in the order after all objects already in it
+        """
+        if not self.root or self.root.count - self.built >= max(self.built // 2, self.leaf_size):
+            objects = [None] * len(self.objects)
+            for i, o in zip(self.order, self.objects):
+                objects[i] = o
+            self.__init__(objects + [obj], self.leaf_size)
+            return
+        i = len(self.objects)
+        minimum, maximum = np.asarray(obj.mesh.minimum, dtype=float), np.asarray(obj.mesh.maximum, dtype=float)
+        if i == len(self.minimums):
+            # capacity is doubled so inserting stays amortized constant
+            self.minimums = np.concatenate((self.minimums, np.zeros_like(self.minimums)))
+            self.maximums = np.concatenate((self.maximums, np.zeros_like(self.maximums)))
+        self.minimums[i] = minimum
+        self.maximums[i] = maximum
+        self.objects.append(obj)
+        self.order.append(len(self.order))
+        self.centers.append(tuple(0.5 * (minimum + maximum)))
+        self.radii.append(obj.mesh.radius)
+        self.slots[obj] = i
+        node = self.root
+        while True:
+            node.inserted.append(i)
+            node.fit(np.minimum(node.minimum, minimum), np.maximum(node.maximum, maximum))
+            if not node.children:
+                break
+            # the child whose box grows the least in volume
+            node = min(node.children, key=lambda child: float(np.prod(np.maximum(child.maximum, maximum) - np.minimum(child.minimum, minimum)) - np.prod(child.maximum - child.minimum)))
+        self.leaves.append(node)
+
+    def refit(self, objects):
+        """
+        updates the boxes of objects after their meshes moved or changed
+        only their leaves and the ancestors of those are refitted,
+        work is proportional to the number of objects times the depth of the tree
+        objects not in the tree yet are inserted
+        """
+        nodes = set()
+        for obj in objects:
+            if obj not in self.slots:
+                self.insert(obj)
+                continue
+            i = self.slots[obj]
+            self.minimums[i] = obj.mesh.minimum
+            self.maximums[i] = obj.mesh.maximum
+            self.centers[i] = tuple(0.5 * (self.minimums[i] + self.maximums[i]))
+            self.radii[i] = obj.mesh.radius
+            nodes.add(self.leaves[i])
+        # level by level upwards, a node is refitted again after any of its children was
+        while nodes:
+            parents = set()
+            for node in nodes:
+                if node.children:
+                    minimum = np.minimum.reduce([child.minimum for child in node.children])
+                    maximum = np.maximum.reduce([child.maximum for child in node.children])
+                else:
+                    indices = node.indices()
+                    minimum = self.minimums[indices].min(axis=0)
+                    maximum = self.maximums[indices].max(axis=0)
+                node.fit(minimum, maximum)
+                if node.parent:
+                    parents.add(node.parent)
+            nodes = parents
+
+    def query(self, frustum):
+        """
+        returns the objects not rejected by the frustum and the number of culled objects
+        whole subtrees are rejected or accepted without visiting their objects
+        visible objects keep the order they were given in
+        """
+        visible = []
+        culled = 0
+        stack = [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            side = frustum.classify_sphere(node.center, node.radius)
+            if side == Frustum.OUTSIDE:
+                culled += node.count
+            elif side == Frustum.INSIDE:
+                visible.extend(range(node.start, node.end))
+                visible.extend(node.inserted)
+            elif node.children:
+                stack.extend(reversed(node.children))
+            else:
+                for i in node.indices():
+                    if frustum.classify_sphere(self.centers[i], self.radii[i]) == Frustum.OUTSIDE:
+                        culled += 1
+                    else:
+                        visible.append(i)
+        visible.sort(key=self.order.__getitem__)
+        return [self.objects[i] for i in visible], culled
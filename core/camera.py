@@ -1,7 +1,12 @@
-from math import tan, pi
+from math import sin, cos, tan, pi
+import numpy as np
 from core.window import WindowPoint, WindowLine, WindowPolygon
 from core.world import WorldPoint, WorldLine, WorldPolygon
 from core.rotation import Rotation
+from core.frustum import Frustum
+from core.clipping import PackedPolygons, clip_polygons, clip_lines, clip_points, frustum_planes
+from core.screen import ScreenGeometry
+from core.instancing import mesh_runs, front_faces
 
 class Camera:
     """
@@ -10,12 +15,19 @@ class Camera:
     rotation is a Rotation
     clipping_planes is a tuple of two elements for near and far
     fov is the field of view angle in radians
+    view matrix and projection constant are cached and only rebuilt
+    when position, rotation, fov or clipping planes change, rebuilds counts how often
     """
     def __init__(self):
         self.position = WorldPoint(0, 0, 0)
         self.rotation = Rotation(0, 0)
         self.clipping_planes = (1, 5)
         self.fov = 0.6 * pi
+        self.rebuilds = 0
+        self.view_key = None
+        self.view_rows = None
+        self.view_matrix = None
+        self.projection = None
 
     def __repr__(self):
         return f"Camera(position: {self.position}, rotation: {self.rotation}, clippings: {self.clipping_planes}, fov: {self.fov})"
@@ -44,16 +56,203 @@ class Camera:
         if clipped_relative_polygon:
             return WindowPolygon([self.perspective(p) for p in clipped_relative_polygon.vertices])
     
+    def render_mesh(self, mesh, bounds, cull_back_faces=True, profiler=None):
+        """
+        converts Mesh to ScreenGeometry, see render_meshes
+        """
+        return self.render_meshes([mesh], bounds, cull_back_faces, profiler)
+
+    def render_meshes(self, meshes, bounds, cull_back_faces=True, profiler=None, outlines=None, inside=None):
+        """
+        converts the faces, edges and vertices of the meshes to ScreenGeometry
+        clipped to the window rectangle bounds = (min_x, min_y, max_x, max_y)
+        every vertex is transformed once and shared by all primitives using it
+        primitives are clipped against all six frustum planes in homogeneous
+        clip space in a single pass before the perspective divide
+        faces of closed meshes pointing away from the camera are skipped
+        unless cull_back_faces is False
+        outlines tells for every mesh whether its edges and vertices are rendered, all by default
+        inside tells for every mesh whether it is known to be inside the clipping volume,
+        the primitives of those meshes are not clipped
+        stages are timed when a Profiler is given
+        """
+        outlines = [True] * len(meshes) if outlines is None else outlines
+        vertex_counts = [mesh.vertex_count for mesh in meshes]
+        face_counts = [mesh.face_count for mesh in meshes]
+        edge_counts = [len(mesh.edges) if outline else 0 for mesh, outline in zip(meshes, outlines)]
+        # copies of the same template are expanded and packed together
+        runs = list(mesh_runs(meshes))
+
+        relative = self.relative_positions(np.concatenate([vertices for _, _, vertices in runs]) if meshes else np.zeros((0, 3)))
+        # homogeneous clip coordinates (cx, cy, w)
+        k = self.projection
+        homogeneous = np.column_stack((-k * relative[:, 1], k * relative[:, 2], relative[:, 0]))
+        if profiler:
+            profiler.mark("transform", len(relative))
+
+        # faces of all meshes packed with global vertex indices
+        front = [np.zeros(0, dtype=bool)]
+        face_indices = [np.zeros(0, dtype=np.int64)]
+        face_sizes = [np.zeros(0, dtype=np.int64)]
+        edges = [np.zeros((0, 2), dtype=np.int64)]
+        base = 0
+        for template, count, vertices in runs:
+            bases = base + template.vertex_count * np.arange(count)
+            front.append(front_faces(template, vertices, count, self.position) if cull_back_faces else np.ones(count * template.face_count, dtype=bool))
+            face_indices.append((template.face_indices + bases[:, None]).ravel())
+            face_sizes.append(np.tile(np.diff(template.face_offsets), count))
+            edges.append((template.edges + bases[:, None, None]).reshape(-1, 2))
+            base += len(vertices)
+        face_indices = np.concatenate(face_indices)
+        face_sizes = np.concatenate(face_sizes)
+        faces = PackedPolygons(homogeneous[face_indices], np.concatenate(([0], np.cumsum(face_sizes)))).select(np.concatenate(front))
+        edges = np.concatenate(edges)[np.repeat(np.asarray(outlines, dtype=bool), [len(mesh.edges) for mesh in meshes])]
+        outlined = np.repeat(np.asarray(outlines, dtype=bool), vertex_counts)
+
+        planes = frustum_planes(*self.clipping_planes, *bounds)
+        if inside is None or not any(inside):
+            polygons = clip_polygons(faces, planes)
+            lines, line_sources = clip_lines(homogeneous[edges], planes)
+            point_sources = np.nonzero(clip_points(homogeneous, planes) & outlined)[0]
+            clipped = len(faces) + len(edges) + len(homogeneous)
+        else:
+            inside = np.asarray(inside, dtype=bool)
+            # primitives of meshes inside are passed through, the rest is clipped and merged back in order
+            whole = np.repeat(inside, face_counts)[faces.sources]
+            polygons = PackedPolygons.merge([clip_polygons(faces.select(~whole), planes), faces.select(whole)])
+            whole_edges = np.repeat(inside, edge_counts)
+            rest = np.nonzero(~whole_edges)[0]
+            lines, line_sources = clip_lines(homogeneous[edges[rest]], planes)
+            lines = np.concatenate((lines, homogeneous[edges[whole_edges]]))
+            line_sources = np.concatenate((rest[line_sources], np.nonzero(whole_edges)[0]))
+            order = np.argsort(line_sources, kind="stable")
+            lines, line_sources = lines[order], line_sources[order]
+            kept = np.repeat(inside, vertex_counts)
+            rest = np.nonzero(~kept)[0]
+            kept[rest] = clip_points(homogeneous[rest], planes)
+            point_sources = np.nonzero(kept & outlined)[0]
+            clipped = int((~whole).sum()) + len(rest) + int((~whole_edges).sum())
+        if profiler:
+            profiler.mark("clip", clipped)
+
+        polygons.vertices = self.divide(polygons.vertices)
+        lines = self.divide(lines.reshape(-1, 3)).reshape(-1, 2, 3)
+        points = self.divide(homogeneous[point_sources])
+        if profiler:
+            profiler.mark("perspective", len(polygons.vertices) + 2 * len(lines) + len(points))
+
+        objects = np.arange(len(meshes))
+        return ScreenGeometry(
+            polygons, np.repeat(objects, face_counts)[polygons.sources],
+            lines, np.repeat(objects, edge_counts)[line_sources],
+            points, np.repeat(objects, vertex_counts)[point_sources]
+        )
+
+    @staticmethod
+    def divide(homogeneous):
+        """
+        perspective divide of an array of shape (n, 3) of clip coordinates (cx, cy, w)
+        returns window coordinates and depth (x, y, w)
+        """
+        result = homogeneous.copy()
+        result[:, :2] /= homogeneous[:, 2:]
+        return result
+
+    def view(self):
+        """
+        returns the cached view matrix, rebuilding it and the projection
+        constant if position, rotation, fov or clipping planes changed since the last call
+        """
+        key = (*self.position, self.rotation.a, self.rotation.b, self.fov, *self.clipping_planes)
+        if key != self.view_key:
+            self.view_key = key
+            self.rebuilds += 1
+            sa, ca = sin(-self.rotation.a), cos(-self.rotation.a)
+            sb, cb = sin(self.rotation.b), cos(self.rotation.b)
+            # rotate_z(-a) followed by rotate_y(b) as a single matrix
+            self.view_rows = (
+                (ca * cb, -sa * cb, sb),
+                (sa, ca, 0),
+                (-ca * sb, sa * sb, cb)
+            )
+            self.view_matrix = np.array(self.view_rows)
+            self.projection = 0.5 / tan(0.5 * self.fov)
+        return self.view_matrix
+
+    def frustum(self, min_x, min_y, max_x, max_y):
+        """
+        Frustum in world coordinates bounded by the clipping planes and
+        the window rectangle defined by the lines
+        x = min_x, y = min_y, x = max_x, y = max_y
+        """
+        matrix = self.view()
+        k = self.projection
+        near, far = self.clipping_planes
+        # planes in relative coordinates
+        planes = np.array([
+            [1, 0, 0, -near],
+            [-1, 0, 0, far],
+            [-min_x, -k, 0, 0],
+            [max_x, k, 0, 0],
+            [-min_y, 0, k, 0],
+            [max_y, 0, -k, 0]
+        ], dtype=float)
+        planes /= np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+        # relative = matrix @ (p - position) so n . relative = (matrix.T @ n) . (p - position)
+        normals = planes[:, :3] @ matrix
+        offsets = planes[:, 3] - normals @ tuple(self.position)
+        return Frustum(np.column_stack((normals, offsets)))
+
     def relative_position(self, world_point):
         """
         relative world position of the WorldPoint
         """
-        return (world_point - self.position).rotate_z(-self.rotation.a).rotate_y(self.rotation.b)
+        self.view()
+        (m00, m01, m02), (m10, m11, m12), (m20, m21, m22) = self.view_rows
+        x, y, z = world_point.x - self.position.x, world_point.y - self.position.y, world_point.z - self.position.z
+        return WorldPoint(m00 * x + m01 * y + m02 * z, m10 * x + m11 * y + m12 * z, m20 * x + m21 * y + m22 * z)
     
+    def transform_points(self, points):
+        """
+        batched version of relative_position and perspective
+        points is an array of shape (n, 3) of world coordinates
+        returns relative positions (n, 3), window coordinates (n, 2)
+        and a boolean mask of points between the clipping planes
+        window coordinates of points that are not visible are meaningless
+        """
+        relative = self.relative_positions(points)
+        window, visible = self.project(relative)
+        return relative, window, visible
+
+    def relative_positions(self, points):
+        """
+        batched version of relative_position for an array of shape (n, 3)
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        # elementwise instead of a matrix product so every point gets
+        # exactly the same result no matter how many are transformed together
+        return ((points - tuple(self.position))[:, None, :] * self.view()).sum(axis=2)
+
+    def project(self, relative):
+        """
+        batched version of perspective for an array of shape (n, 3)
+        returns window coordinates (n, 2) and a boolean mask of points between the clipping planes
+        """
+        x = relative[:, 0]
+        near, far = self.clipping_planes
+        visible = (near < x) & (x < far)
+        k = self.projection
+        inverse_x = np.divide(k, x, out=np.zeros_like(x), where=x != 0)
+        window = np.empty((len(relative), 2))
+        window[:, 0] = -relative[:, 1] * inverse_x
+        window[:, 1] = relative[:, 2] * inverse_x
+        return window, visible
+
     def perspective(self, relative_point):
         """
         converts relative WorldPoint to WindowPoint
         """
         x, y, z = relative_point
-        k = 0.5 / tan(0.5 * self.fov)
+        self.view()
+        k = self.projection
         return WindowPoint(-k * y / x, k * z / x)
@@ -0,0 +1,177 @@
+import numpy as np
+
+def plane_distances(points, normals, offsets):
+    """
+    normal . point + offset of points of shape (n, d) for normals of shape (k, d)
+    computed elementwise so the result of a point never depends on the others
+    """
+    return (points[:, None, :] * normals).sum(axis=2) + offsets
+
+class PackedPolygons:
+    """
+    many polygons stored packed
+    vertices is an array of shape (n, d), polygon i is vertices[offsets[i]:offsets[i + 1]]
+    sources holds the index of the input polygon every polygon came from
+    """
+    def __init__(self, vertices, offsets, sources=None):
+        self.vertices = np.asarray(vertices, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.sources = np.arange(len(self.offsets) - 1) if sources is None else np.asarray(sources, dtype=np.int64)
+
+    def __repr__(self):
+        return f"PackedPolygons(polygons: {len(self)}, vertices: {len(self.vertices)})"
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield self.vertices[start:end]
+
+    @classmethod
+    def from_polygons(cls, polygons, dimension):
+        """
+        packs WorldPolygon or WindowPolygon objects
+        """
+        vertices = [tuple(p) for polygon in polygons for p in polygon.vertices]
+        offsets = np.cumsum([0] + [len(polygon.vertices) for polygon in polygons])
+        return cls(np.array(vertices, dtype=float).reshape(-1, dimension), offsets)
+
+    @property
+    def sizes(self):
+        return np.diff(self.offsets)
+
+    def select(self, mask):
+        """
+        polygons for which mask is true
+        """
+        mask = np.asarray(mask, dtype=bool)
+        keep = np.repeat(mask, self.sizes)
+        offsets = np.concatenate(([0], np.cumsum(self.sizes[mask])))
+        return PackedPolygons(self.vertices[keep], offsets, self.sources[mask])
+
+    def take(self, indices):
+        """
+        polygons with the given indices in that order
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        sizes = self.sizes[indices]
+        offsets = np.concatenate(([0], np.cumsum(sizes)))
+        # index of every vertex of the taken polygons in the old vertices
+        vertices = np.repeat(self.offsets[:-1][indices] - offsets[:-1], sizes) + np.arange(offsets[-1])
+        return PackedPolygons(self.vertices[vertices].reshape(-1, self.vertices.shape[1]), offsets, self.sources[indices])
+
+    @classmethod
+    def merge(cls, parts):
+        """
+        polygons of all parts ordered by their sources
+        """
+        vertices = np.concatenate([part.vertices for part in parts])
+        sizes = np.concatenate([part.sizes for part in parts])
+        sources = np.concatenate([part.sources for part in parts])
+        merged = cls(vertices, np.concatenate(([0], np.cumsum(sizes))), sources)
+        return merged.take(np.argsort(sources, kind="stable"))
+
+def clip_plane(packed, normal, offset):
+    """
+    Sutherland Hodgman Polygon Clipping Algorithm one plane clipping
+    on all polygons at once, removes the vertices v with normal . v + offset < 0
+    """
+    vertices = packed.vertices
+    n = len(vertices)
+    if n == 0:
+        return packed
+    distances = (vertices * np.asarray(normal, dtype=float)).sum(axis=1) + offset
+    sizes = packed.sizes
+    starts = packed.offsets[:-1][sizes > 0]
+    ends = packed.offsets[1:][sizes > 0]
+    # every vertex is processed together with the edge coming from its predecessor
+    previous = np.arange(-1, n - 1)
+    previous[starts] = ends - 1
+    inside = distances >= 0
+    crossing = inside != inside[previous]
+    counts = inside.astype(np.int64) + crossing
+    positions = np.concatenate(([0], np.cumsum(counts)))
+    result = np.empty((positions[-1], vertices.shape[1]))
+
+    # intersection of the edge with the plane comes first
+    c = np.nonzero(crossing)[0]
+    p = previous[c]
+    t = distances[p] / (distances[p] - distances[c])
+    result[positions[c]] = vertices[p] + t[:, None] * (vertices[c] - vertices[p])
+    # followed by the vertex itself if it is kept
+    k = np.nonzero(inside)[0]
+    result[positions[k] + crossing[k]] = vertices[k]
+    return PackedPolygons(result, positions[packed.offsets], packed.sources)
+
+def clip_polygons(packed, planes):
+    """
+    Sutherland Hodgman Polygon Clipping Algorithm on many polygons at once
+    planes is a sequence of (normal, offset), the vertices v with
+    normal . v + offset >= 0 are kept
+    polygons left with less than three vertices are dropped
+    """
+    for normal, offset in planes:
+        packed = clip_plane(packed, normal, offset)
+    return packed.select(packed.sizes > 2)
+
+def window_planes(min_x, min_y, max_x, max_y):
+    """
+    planes of the rectangle defined by the lines
+    x = min_x, y = min_y, x = max_x, y = max_y
+    in the order WindowPolygon.clipped uses
+    """
+    return [((1, 0), -min_x), ((0, 1), -min_y), ((-1, 0), max_x), ((0, -1), max_y)]
+
+def depth_planes(near, far):
+    """
+    planes x = near and x = far in the order WorldPolygon.clipped uses
+    """
+    return [((1, 0, 0), -near), ((-1, 0, 0), far)]
+
+def clip_lines(segments, planes):
+    """
+    parametric line clipping on many segments at once
+    segments is an array of shape (m, 2, d) of endpoints
+    returns the clipped segments and the indices of the input segments they came from
+    """
+    segments = np.asarray(segments, dtype=float)
+    normals = np.array([normal for normal, _ in planes], dtype=float)
+    offsets = np.array([offset for _, offset in planes], dtype=float)
+    d1 = plane_distances(segments[:, 0], normals, offsets)
+    d2 = plane_distances(segments[:, 1], normals, offsets)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = d1 / (d1 - d2)
+    # the segment enters the half space where the start is outside and leaves it where the end is outside
+    t_enter = np.where((d1 < 0) & (d2 >= 0), t, 0).max(axis=1, initial=0)
+    t_exit = np.where((d2 < 0) & (d1 >= 0), t, 1).min(axis=1, initial=1)
+    kept = ~((d1 < 0) & (d2 < 0)).any(axis=1) & (t_enter <= t_exit)
+    start = segments[kept, 0]
+    direction = segments[kept, 1] - start
+    clipped = np.stack((
+        start + t_enter[kept, None] * direction,
+        start + t_exit[kept, None] * direction
+    ), axis=1)
+    return clipped, np.nonzero(kept)[0]
+
+def clip_points(points, planes):
+    """
+    boolean mask of points strictly inside all of the planes
+    """
+    normals = np.array([normal for normal, _ in planes], dtype=float)
+    offsets = np.array([offset for _, offset in planes], dtype=float)
+    return (plane_distances(np.asarray(points, dtype=float), normals, offsets) > 0).all(axis=1)
+
+def frustum_planes(near, far, min_x, min_y, max_x, max_y):
+    """
+    the six frustum planes in homogeneous clip space (cx, cy, w) where the
+    window coordinates are (cx / w, cy / w) and w is the distance along the view direction
+    """
+    return [
+        ((0, 0, 1), -near),
+        ((0, 0, -1), far),
+        ((1, 0, -min_x), 0),
+        ((0, 1, -min_y), 0),
+        ((-1, 0, max_x), 0),
+        ((0, -1, max_y), 0)
+    ]
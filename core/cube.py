@@ -1,11 +1,18 @@
 from core.world import WorldPoint, WorldLine, WorldPolygon
+from core.mesh import Mesh
 
 class Cube:
     """
     cube in the world
     center coordinates are WorldPoint
     s is scale
+    mesh is the indexed form of corners, edges and faces
+    faces are wound counterclockwise seen from outside
     """
+    # ordered as paths so connected edges can be drawn together
+    EDGES = [(0, 1), (1, 3), (3, 7), (0, 2), (2, 6), (6, 7), (0, 4), (4, 5), (5, 7), (1, 5), (2, 3), (4, 6)]
+    FACES = [(0, 1, 3, 2), (0, 4, 5, 1), (0, 2, 6, 4), (1, 5, 7, 3), (2, 3, 7, 6), (4, 6, 7, 5)]
+
     def __init__(self, cx, cy, cz, s):
         self.x = cx
         self.y = cy
@@ -13,7 +20,15 @@ class Cube:
         self.s = s
         sl = [-s / 2, s / 2]
         self.corners = [WorldPoint(self.x + x, self.y + y, self.z + z) for x in sl for y in sl for z in sl]
-        el = [(0, 1), (0, 2), (0, 4), (1, 3), (1, 5), (2, 3), (2, 6), (3, 7), (4, 5), (4, 6), (5, 7), (6, 7)]
+        el = Cube.EDGES
         self.edges = [WorldLine(self.corners[i], self.corners[j]) for i, j in el]
-        fl = [(0, 1, 3, 2), (0, 1, 5, 4), (0, 2, 6, 4), (1, 3, 7, 5), (2, 3, 7, 6), (4, 5, 7, 6)]
+        fl = Cube.FACES
         self.faces = [WorldPolygon([self.corners[i], self.corners[j], self.corners[k], self.corners[l]]) for i, j, k, l in fl]
+        self.mesh = Mesh([tuple(p) for p in self.corners], el, fl)
+
+def unit_cube():
+    """
+    mesh of a cube of size 1 around the origin, the template for instanced cubes
+    """
+    sl = [-0.5, 0.5]
+    return Mesh([(x, y, z) for x in sl for y in sl for z in sl], Cube.EDGES, Cube.FACES)
@@ -0,0 +1,57 @@
+import numpy as np
+
+class Frustum:
+    """
+    view volume in the world
+    planes is an array of shape (6, 4), a point p is inside of the plane
+    (a, b, c, d) when a * p.x + b * p.y + c * p.z + d >= 0
+    plane normals are unit length so the value is the signed distance
+    """
+    OUTSIDE = -1
+    INTERSECTING = 0
+    INSIDE = 1
+
+    def __init__(self, planes):
+        self.planes = np.asarray(planes, dtype=float)
+        self.normals = self.planes[:, :3]
+        self.offsets = self.planes[:, 3]
+
+    def __repr__(self):
+        return f"Frustum({self.planes.tolist()})"
+
+    def grown(self, margin):
+        """
+        Frustum with every plane moved outwards by margin
+        """
+        return Frustum(np.column_stack((self.normals, self.offsets + margin)))
+
+    def distances(self, centers):
+        """
+        signed distances of points of shape (n, 3) to every plane, shape (n, 6)
+        """
+        return np.asarray(centers, dtype=float).reshape(-1, 3) @ self.normals.T + self.offsets
+
+    def classify_sphere(self, center, radius):
+        """
+        returns OUTSIDE, INTERSECTING or INSIDE for the sphere
+        """
+        cx, cy, cz = center
+        inside = True
+        for a, b, c, d in self.planes.tolist():
+            distance = a * cx + b * cy + c * cz + d
+            if distance < -radius:
+                return Frustum.OUTSIDE
+            if distance < radius:
+                inside = False
+        return Frustum.INSIDE if inside else Frustum.INTERSECTING
+
+    def classify_spheres(self, centers, radii):
+        """
+        batched classify_sphere for centers of shape (n, 3) and radii of shape (n,)
+        """
+        distances = self.distances(centers)
+        radii = np.asarray(radii, dtype=float).reshape(-1, 1)
+        result = np.full(len(distances), Frustum.INTERSECTING)
+        result[(distances >= radii).all(axis=1)] = Frustum.INSIDE
+        result[(distances < -radii).any(axis=1)] = Frustum.OUTSIDE
+        return result
@@ -0,0 +1,175 @@
+from math import floor
+import numpy as np
+
+class SpatialGrid:
+    """
+    uniform spatial hash grid of the bounding boxes of objects
+    cells maps the integer coordinates of a cell of size cell to the objects overlapping it
+    a box query only looks at the objects in the cells it covers
+    objects can be inserted, removed and moved one at a time
+    without a cell size it is the median of the largest extents of the objects,
+    so most objects cover only a few cells and a cell holds only a few objects
+    objects with a solid_boxes(minimum, maximum) method, like voxel chunks, are tested
+    against the boxes it returns instead of their bounding box
+    """
+    SKIN = 1e-6
+    DEFAULT_CELL = 2.0
+
+    def __init__(self, objects=(), cell=None):
+        objects = list(objects)
+        self.cell = cell if cell else SpatialGrid.cell_size(objects)
+        self.cells = {}
+        self.entries = {}
+        for obj in objects:
+            self.insert(obj)
+
+    def __repr__(self):
+        return f"SpatialGrid(objects: {len(self.entries)}, cells: {len(self.cells)}, cell: {self.cell})"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, obj):
+        return obj in self.entries
+
+    @staticmethod
+    def cell_size(objects):
+        """
+        median of the largest extents of the bounding boxes of objects
+        """
+        if not objects:
+            return SpatialGrid.DEFAULT_CELL
+        extents = np.array([(obj.mesh.maximum - obj.mesh.minimum).max() for obj in objects])
+        cell = float(np.median(extents))
+        return cell if cell > 0 else SpatialGrid.DEFAULT_CELL
+
+    def cell_range(self, minimum, maximum):
+        """
+        first and last cell coordinates covered by a box
+        """
+        c = self.cell
+        return tuple(floor(v / c) for v in minimum), tuple(floor(v / c) for v in maximum)
+
+    def keys(self, first, last):
+        return ((x, y, z) for x in range(first[0], last[0] + 1) for y in range(first[1], last[1] + 1) for z in range(first[2], last[2] + 1))
+
+    def insert(self, obj):
+        """
+        adds obj with the current bounding box of its mesh
+        """
+        minimum, maximum = tuple(obj.mesh.minimum.tolist()), tuple(obj.mesh.maximum.tolist())
+        first, last = self.cell_range(minimum, maximum)
+        for key in self.keys(first, last):
+            self.cells.setdefault(key, []).append(obj)
+        self.entries[obj] = (first, last, minimum, maximum)
+
+    def remove(self, obj):
+        first, last, _, _ = self.entries.pop(obj)
+        for key in self.keys(first, last):
+            cell = self.cells[key]
+            cell.remove(obj)
+            if not cell:
+                del self.cells[key]
+
+    def move(self, obj):
+        """
+        updates obj after its mesh moved or changed, only the cells it left or entered change
+        """
+        if obj not in self.entries:
+            self.insert(obj)
+            return
+        first, last, _, _ = self.entries[obj]
+        minimum, maximum = tuple(obj.mesh.minimum.tolist()), tuple(obj.mesh.maximum.tolist())
+        new_first, new_last = self.cell_range(minimum, maximum)
+        if (new_first, new_last) != (first, last):
+            old = set(self.keys(first, last))
+            new = set(self.keys(new_first, new_last))
+            for key in old - new:
+                cell = self.cells[key]
+                cell.remove(obj)
+                if not cell:
+                    del self.cells[key]
+            for key in new - old:
+                self.cells.setdefault(key, []).append(obj)
+        self.entries[obj] = (new_first, new_last, minimum, maximum)
+
+    def candidates(self, minimum, maximum):
+        """
+        objects whose bounding boxes overlap the box from minimum to maximum, touching does not count
+        """
+        first, last = self.cell_range(minimum, maximum)
+        (x1, y1, z1), (x2, y2, z2) = minimum, maximum
+        found = []
+        seen = set()
+        for key in self.keys(first, last):
+            for obj in self.cells.get(key, ()):
+                if obj in seen:
+                    continue
+                seen.add(obj)
+                _, _, (a1, b1, c1), (a2, b2, c2) = self.entries[obj]
+                if x1 < a2 and a1 < x2 and y1 < b2 and b1 < y2 and z1 < c2 and c1 < z2:
+                    found.append(obj)
+        return found
+
+    def boxes(self, obj, minimum, maximum):
+        """
+        boxes of the solid parts of obj that may overlap the box from minimum to maximum
+        """
+        solid_boxes = getattr(obj, "solid_boxes", None)
+        if solid_boxes is None:
+            _, _, low, high = self.entries[obj]
+            return [(low, high)]
+        return solid_boxes(minimum, maximum)
+
+    def query(self, minimum, maximum):
+        """
+        objects whose solid parts overlap the box from minimum to maximum, touching does not count
+        """
+        return [obj for obj in self.candidates(minimum, maximum) if overlapping(self.boxes(obj, minimum, maximum), minimum, maximum)]
+
+    def sweep(self, minimum, maximum, delta):
+        """
+        moves the box from minimum to maximum by delta one axis at a time
+        stopping just before the solid parts of the objects it would run into
+        anywhere along the way, so a large delta cannot pass through thin parts
+        solid parts the box already overlaps do not stop it, so it can get out of them
+        the grid is looked up once for the box swept over the whole delta
+        returns the allowed delta and for every axis whether it was blocked
+        """
+        minimum, maximum = list(minimum), list(maximum)
+        swept_min = [v + min(d, 0) for v, d in zip(minimum, delta)]
+        swept_max = [v + max(d, 0) for v, d in zip(maximum, delta)]
+        boxes = []
+        for obj in self.candidates(swept_min, swept_max):
+            boxes.extend(box for box in self.boxes(obj, swept_min, swept_max) if not overlapping([box], minimum, maximum))
+        moved = [0.0, 0.0, 0.0]
+        blocked = [False, False, False]
+        for axis in range(3):
+            d = delta[axis]
+            if d == 0:
+                continue
+            # the box swept along the axis
+            low, high = list(minimum), list(maximum)
+            low[axis] += min(d, 0)
+            high[axis] += max(d, 0)
+            hits = [box for box in boxes if overlapping([box], low, high)]
+            if hits:
+                blocked[axis] = True
+                if d > 0:
+                    d = max(min(box[0][axis] for box in hits) - maximum[axis] - SpatialGrid.SKIN, 0.0)
+                else:
+                    d = min(max(box[1][axis] for box in hits) - minimum[axis] + SpatialGrid.SKIN, 0.0)
+            minimum[axis] += d
+            maximum[axis] += d
+            moved[axis] = d
+        return moved, blocked
+
+def overlapping(boxes, minimum, maximum):
+    """
+    whether any of the boxes overlaps the box from minimum to maximum, touching does not count
+    """
+    (x1, y1, z1), (x2, y2, z2) = minimum, maximum
+    for (a1, b1, c1), (a2, b2, c2) in boxes:
+        if x1 < a2 and a1 < x2 and y1 < b2 and b1 < y2 and z1 < c2 and c1 < z2:
+            return True
+    return False
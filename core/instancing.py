@@ -0,0 +1,156 @@
+import numpy as np
+
+class Instances:
+    """
+    many copies of one template Mesh
+    positions is an array of shape (n, 3) and scales an array of shape (n,)
+    every instance is a small Instance object pointing at its row in these arrays,
+    vertices are only computed when rendered, all visible instances of a frame at once
+    the bounding boxes and spheres of all instances are kept as arrays
+    """
+    def __init__(self, template, positions, scales=None):
+        self.template = template
+        self.positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        self.scales = np.ones(len(self.positions)) if scales is None else np.broadcast_to(np.asarray(scales, dtype=float), (len(self.positions),)).copy()
+        self.members = [Instance(self, i) for i in range(len(self.positions))]
+        self.update_bounds()
+
+    def __repr__(self):
+        return f"Instances({self.template}, count: {len(self)})"
+
+    def __len__(self):
+        return len(self.positions)
+
+    def update_bounds(self):
+        """
+        recomputes the bounding boxes and spheres after positions or scales changed
+        """
+        scales = self.scales[:, None]
+        low, high = self.template.minimum * scales, self.template.maximum * scales
+        self.minimums = np.minimum(low, high) + self.positions
+        self.maximums = np.maximum(low, high) + self.positions
+        self.centers = self.template.center * scales + self.positions
+        self.radii = self.template.radius * np.abs(self.scales)
+
+    def vertices(self, indices):
+        """
+        world coordinates of the template vertices of the given instances, one after the other
+        """
+        return (self.template.vertices * self.scales[indices, None, None] + self.positions[indices, None]).reshape(-1, 3)
+
+    def objects(self):
+        """
+        the instances as objects of the world, in order
+        """
+        return list(self.members)
+
+class Instance:
+    """
+    one of Instances, an object of the world that is also its own mesh
+    it answers everything the renderer asks a Mesh from the template and the arrays
+    """
+    __slots__ = ("instances", "index")
+
+    def __init__(self, instances, index):
+        self.instances = instances
+        self.index = index
+
+    def __repr__(self):
+        return f"Instance({self.index} of {self.instances})"
+
+    @property
+    def mesh(self):
+        return self
+
+    @property
+    def template(self):
+        return self.instances.template
+
+    @property
+    def vertices(self):
+        return self.instances.vertices([self.index])
+
+    @property
+    def edges(self):
+        return self.instances.template.edges
+
+    @property
+    def face_indices(self):
+        return self.instances.template.face_indices
+
+    @property
+    def face_offsets(self):
+        return self.instances.template.face_offsets
+
+    @property
+    def face_normals(self):
+        # uniform scaling keeps the direction of the normals
+        return self.instances.template.face_normals
+
+    @property
+    def closed(self):
+        return self.instances.template.closed
+
+    @property
+    def face_count(self):
+        return self.instances.template.face_count
+
+    @property
+    def vertex_count(self):
+        return self.instances.template.vertex_count
+
+    @property
+    def minimum(self):
+        return self.instances.minimums[self.index]
+
+    @property
+    def maximum(self):
+        return self.instances.maximums[self.index]
+
+    @property
+    def center(self):
+        return self.instances.centers[self.index]
+
+    @property
+    def radius(self):
+        return float(self.instances.radii[self.index])
+
+    def update_bounds(self):
+        self.instances.update_bounds()
+
+    def update_normals(self):
+        pass
+
+    def front_faces(self, position):
+        return front_faces(self.instances.template, self.vertices, 1, position)
+
+def front_faces(template, vertices, count, position):
+    """
+    boolean mask of the faces of count copies of template with the given vertices facing the point position
+    """
+    if not template.closed:
+        return np.ones(count * template.face_count, dtype=bool)
+    firsts = template.face_indices[template.face_offsets[:-1]]
+    first = vertices.reshape(count, template.vertex_count, 3)[:, firsts].reshape(-1, 3)
+    normals = np.tile(template.face_normals, (count, 1))
+    return ((first - tuple(position)) * normals).sum(axis=1) < 0
+
+def mesh_runs(meshes):
+    """
+    splits meshes into runs of consecutive copies of the same template
+    yields (template, count, vertices) with the vertices of all copies of the run
+    instances of the same Instances are expanded together, every other mesh is its own run
+    """
+    start = 0
+    while start < len(meshes):
+        mesh = meshes[start]
+        instances = getattr(mesh, "instances", None)
+        if instances is None:
+            yield mesh, 1, mesh.vertices
+            start += 1
+            continue
+        end = start + 1
+        while end < len(meshes) and getattr(meshes[end], "instances", None) is instances:
+            end += 1
+        yield instances.template, end - start, instances.vertices([m.index for m in meshes[start:end]])
+        start = end
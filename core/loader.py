@@ -0,0 +1,158 @@
+import json
+import os
+import numpy as np
+from core.mesh import Mesh
+from core.cube import Cube
+from core.model import Model
+
+CACHE_VERSION = 1
+CACHE_ARRAYS = ("vertices", "edges", "face_indices", "face_offsets", "face_normals")
+
+def parse_obj(lines, y_up=True):
+    """
+    vertices, packed faces and lines of Wavefront OBJ text
+    only v, f and l statements are read, texture coordinates and normals are ignored
+    obj files are usually y up, y_up turns them z up like the world
+    """
+    coordinates = []
+    face_indices = []
+    face_sizes = []
+    lines_indices = []
+    count = 0
+    for line in lines:
+        parts = line.split()
+        if not parts:
+            continue
+        kind = parts[0]
+        if kind == "v":
+            coordinates.extend(parts[1:4])
+            count += 1
+        elif kind == "f" or kind == "l":
+            # indices start at 1, negative ones count back from the last vertex
+            indices = [int(part.split("/")[0]) for part in parts[1:]]
+            indices = [i - 1 if i > 0 else count + i for i in indices]
+            if kind == "f":
+                face_indices.extend(indices)
+                face_sizes.append(len(indices))
+            else:
+                lines_indices.extend(zip(indices, indices[1:]))
+    vertices = np.array(coordinates, dtype=float).reshape(-1, 3)
+    if y_up:
+        vertices = np.column_stack((vertices[:, 0], -vertices[:, 2], vertices[:, 1]))
+    face_indices = np.array(face_indices, dtype=np.int64)
+    face_offsets = np.cumsum([0] + face_sizes, dtype=np.int64)
+    return vertices, face_indices, face_offsets, np.array(lines_indices, dtype=np.int64).reshape(-1, 2)
+
+def face_edges(face_indices, face_offsets, extra=None):
+    """
+    unique undirected edges of packed faces and of the extra edges
+    """
+    sizes = np.diff(face_offsets)
+    following = np.arange(1, len(face_indices) + 1)
+    following[face_offsets[1:][sizes > 0] - 1] = face_offsets[:-1][sizes > 0]
+    edges = np.column_stack((face_indices, face_indices[following] if len(following) else face_indices))
+    if extra is not None:
+        edges = np.concatenate((edges, extra))
+    edges = np.sort(edges, axis=1)
+    return np.unique(edges, axis=0) if len(edges) else edges
+
+def load_obj(path, y_up=True, closed=True):
+    """
+    mesh of an OBJ file, parsed from the text
+    """
+    with open(path) as f:
+        vertices, face_indices, face_offsets, lines = parse_obj(f, y_up)
+    return Mesh.from_packed(vertices, face_edges(face_indices, face_offsets, lines), face_indices, face_offsets, closed)
+
+def cache_key(path, y_up):
+    """
+    what a cache entry was built from, it is stale if any of it changed
+    """
+    stat = os.stat(path)
+    return {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "y_up": y_up}
+
+def cache_paths(path, cache_dir=None):
+    """
+    key file and array files of the cache entry of a source file
+    the cache lives in __meshcache__ next to the source unless cache_dir is given
+    """
+    directory = cache_dir if cache_dir else os.path.join(os.path.dirname(os.path.abspath(path)), "__meshcache__")
+    stem = os.path.join(directory, os.path.basename(path))
+    return stem + ".json", {name: f"{stem}.{name}.npy" for name in CACHE_ARRAYS}
+
+def write_cache(path, mesh, key, cache_dir=None):
+    """
+    saves the arrays of the mesh, the key is written last so a partly written entry is never used
+    """
+    key_path, array_paths = cache_paths(path, cache_dir)
+    os.makedirs(os.path.dirname(key_path), exist_ok=True)
+    if os.path.exists(key_path):
+        os.remove(key_path)
+    for name, array_path in array_paths.items():
+        temporary = array_path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, getattr(mesh, name))
+        os.replace(temporary, array_path)
+    with open(key_path, "w") as f:
+        json.dump(key, f)
+
+def read_cache(path, key, cache_dir=None, closed=True):
+    """
+    mesh with memory mapped arrays from the cache, None if there is no valid entry
+    """
+    key_path, array_paths = cache_paths(path, cache_dir)
+    try:
+        with open(key_path) as f:
+            if json.load(f) != key:
+                return None
+        arrays = {name: np.load(array_path, mmap_mode="r") for name, array_path in array_paths.items()}
+    except (OSError, ValueError):
+        return None
+    return Mesh.from_packed(closed=closed, **arrays)
+
+def load_mesh(path, y_up=True, closed=True, cache=True, cache_dir=None):
+    """
+    mesh of an OBJ file, read from the binary cache if it is newer than the last change of the file
+    otherwise parsed and written to the cache for the next time
+    """
+    if not cache:
+        return load_obj(path, y_up, closed)
+    key = cache_key(path, y_up)
+    mesh = read_cache(path, key, cache_dir, closed)
+    if mesh is None:
+        mesh = load_obj(path, y_up, closed)
+        try:
+            write_cache(path, mesh, key, cache_dir)
+        except OSError:
+            # a read only location only costs the next startup
+            pass
+    return mesh
+
+def load_scene(path, cache=True, cache_dir=None):
+    """
+    objects of a JSON scene manifest
+    meshes maps names to OBJ files relative to the manifest, every mesh is loaded once
+    instances place meshes by name with a position and a scale
+    cubes are [x, y, z, s] like Cube
+
+    {
+        "meshes": {"teapot": {"path": "teapot.obj", "y_up": true, "closed": true}, "rock": "rock.obj"},
+        "instances": [{"mesh": "teapot", "position": [5, 0, 0], "scale": 0.5}],
+        "cubes": [[0, 3, 0, 1]]
+    }
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    meshes = {}
+    for name, entry in manifest.get("meshes", {}).items():
+        if isinstance(entry, str):
+            entry = {"path": entry}
+        meshes[name] = load_mesh(os.path.join(base, entry["path"]), entry.get("y_up", True), entry.get("closed", True), cache, cache_dir)
+    objects = []
+    for instance in manifest.get("instances", []):
+        if instance["mesh"] not in meshes:
+            raise KeyError(f"instance of unknown mesh {instance['mesh']!r} in {path}")
+        objects.append(Model(meshes[instance["mesh"]], instance.get("position", (0, 0, 0)), instance.get("scale", 1.0), instance["mesh"]))
+    objects.extend(Cube(*cube) for cube in manifest.get("cubes", []))
+    return objects
@@ -0,0 +1,57 @@
+import numpy as np
+
+class LevelOfDetail:
+    """
+    chooses how detailed every object is drawn from its projected size
+    FULL draws faces, edges and corners, FACES only faces and IMPOSTOR a single filled square
+    thresholds are the projected radii in window widths below which
+    FULL drops to FACES and FACES drops to IMPOSTOR
+    an object only switches back once it is hysteresis times larger than the threshold
+    counts holds the number of objects drawn at every level in the last frame
+    """
+    FULL = 0
+    FACES = 1
+    IMPOSTOR = 2
+
+    def __init__(self, thresholds=(0.02, 0.004), hysteresis=0.25):
+        self.thresholds = thresholds
+        self.hysteresis = hysteresis
+        self.levels = {}
+        self.counts = [0, 0, 0]
+
+    def __repr__(self):
+        return f"LevelOfDetail(thresholds: {self.thresholds}, hysteresis: {self.hysteresis})"
+
+    def projected_sizes(self, camera, objects):
+        """
+        projected bounding sphere radii of the objects in window widths
+        """
+        if not objects:
+            return np.zeros(0)
+        centers = np.array([obj.mesh.center for obj in objects])
+        radii = np.array([obj.mesh.radius for obj in objects])
+        depths = camera.relative_positions(centers)[:, 0]
+        return camera.projection * radii / np.maximum(depths, camera.clipping_planes[0])
+
+    def select(self, camera, objects):
+        """
+        levels of the objects for this frame
+        """
+        sizes = self.projected_sizes(camera, objects).tolist()
+        levels = []
+        counts = [0, 0, 0]
+        remembered = {}
+        for obj, size in zip(objects, sizes):
+            level = self.levels.get(id(obj), LevelOfDetail.FULL)
+            # coarser while below the threshold of the current level
+            while level < LevelOfDetail.IMPOSTOR and size < self.thresholds[level]:
+                level += 1
+            # finer only once clearly above the threshold of the finer level
+            while level > LevelOfDetail.FULL and size > self.thresholds[level - 1] * (1 + self.hysteresis):
+                level -= 1
+            remembered[id(obj)] = level
+            levels.append(level)
+            counts[level] += 1
+        self.levels = remembered
+        self.counts = counts
+        return levels
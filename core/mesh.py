@@ -0,0 +1,96 @@
+import numpy as np
+
+class Mesh:
+    """
+    indexed mesh
+    vertices is an array of shape (n, 3) of world coordinates
+    edges is an array of shape (m, 2) of vertex indices
+    faces are stored packed, face i is face_indices[face_offsets[i]:face_offsets[i + 1]]
+    minimum and maximum are the corners of the bounding box
+    center and radius describe the bounding sphere around the box center
+    face_normals are computed from the winding, counterclockwise seen from outside
+    closed meshes can have their back faces culled, open meshes are seen from both sides
+    """
+    def __init__(self, vertices, edges, faces, closed=True):
+        self.vertices = np.asarray(vertices, dtype=float).reshape(-1, 3)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.face_indices = np.array([i for face in faces for i in face], dtype=np.int64)
+        self.face_offsets = np.cumsum([0] + [len(face) for face in faces], dtype=np.int64)
+        self.closed = closed
+        self.update_bounds()
+        self.update_normals()
+
+    def __repr__(self):
+        return f"Mesh(vertices: {len(self.vertices)}, edges: {len(self.edges)}, faces: {self.face_count})"
+
+    @classmethod
+    def from_packed(cls, vertices, edges, face_indices, face_offsets, closed=True, face_normals=None):
+        """
+        builds a mesh from already packed face arrays
+        face_normals are only recomputed if not given
+        the arrays are not copied if they already have the right type, memory mapped arrays stay mapped
+        """
+        mesh = cls(vertices, edges, [], closed)
+        mesh.face_indices = np.asarray(face_indices, dtype=np.int64)
+        mesh.face_offsets = np.asarray(face_offsets, dtype=np.int64)
+        if face_normals is None:
+            mesh.update_normals()
+        else:
+            mesh.face_normals = np.asarray(face_normals, dtype=float)
+        return mesh
+
+    def update_bounds(self):
+        """
+        recomputes the bounding box and sphere from the vertices
+        """
+        if len(self.vertices):
+            self.minimum = self.vertices.min(axis=0)
+            self.maximum = self.vertices.max(axis=0)
+        else:
+            self.minimum = self.maximum = np.zeros(3)
+        self.center = 0.5 * (self.minimum + self.maximum)
+        self.radius = float(np.sqrt(((self.vertices - self.center) ** 2).sum(axis=1).max())) if len(self.vertices) else 0.0
+
+    def update_normals(self):
+        """
+        recomputes the unit face normals with Newell's method
+        """
+        sizes = np.diff(self.face_offsets)
+        # index of the next vertex of the same face for every packed vertex
+        following = np.arange(1, len(self.face_indices) + 1)
+        following[self.face_offsets[1:][sizes > 0] - 1] = self.face_offsets[:-1][sizes > 0]
+        current = self.vertices[self.face_indices]
+        after = self.vertices[self.face_indices[following]] if len(following) else current
+        terms = np.column_stack((
+            (current[:, 1] - after[:, 1]) * (current[:, 2] + after[:, 2]),
+            (current[:, 2] - after[:, 2]) * (current[:, 0] + after[:, 0]),
+            (current[:, 0] - after[:, 0]) * (current[:, 1] + after[:, 1])
+        ))
+        normals = np.add.reduceat(terms, self.face_offsets[:-1], axis=0) if self.face_count else np.zeros((0, 3))
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        self.face_normals = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+
+    def front_faces(self, position):
+        """
+        boolean mask of faces facing the point position
+        every face is front facing for open meshes
+        """
+        if not self.closed:
+            return np.ones(self.face_count, dtype=bool)
+        first = self.vertices[self.face_indices[self.face_offsets[:-1]]]
+        return ((first - tuple(position)) * self.face_normals).sum(axis=1) < 0
+
+    @property
+    def face_count(self):
+        return len(self.face_offsets) - 1
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    def faces(self):
+        """
+        iterates over the vertex indices of each face
+        """
+        for i in range(self.face_count):
+            yield self.face_indices[self.face_offsets[i]:self.face_offsets[i + 1]]
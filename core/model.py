@@ -0,0 +1,21 @@
+from core.mesh import Mesh
+
+class Model:
+    """
+    instance of a loaded mesh in the world
+    source is the mesh in model coordinates, mesh is the same mesh
+    scaled by scale and moved to position
+    """
+    def __init__(self, source, position=(0, 0, 0), scale=1.0, name=None):
+        self.source = source
+        self.position = tuple(position)
+        self.scale = scale
+        self.name = name
+        if self.position == (0, 0, 0) and scale == 1:
+            self.mesh = source
+        else:
+            vertices = source.vertices * scale + self.position
+            self.mesh = Mesh.from_packed(vertices, source.edges, source.face_indices, source.face_offsets, source.closed, source.face_normals)
+
+    def __repr__(self):
+        return f"Model({self.name}, position: {self.position}, scale: {self.scale})"
@@ -0,0 +1,238 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from core.camera import Camera
+from core.mesh import Mesh
+from core.instancing import Instances, Instance
+from core.screen import ScreenGeometry
+
+# scene of a worker process, mapped by share_scene when a task brings a new generation of it
+worker_generation = None
+worker_memory = []
+worker_meshes = []
+
+def share_scene(generation, blocks):
+    """
+    maps the shared scene arrays into meshes without copying them, unless generation is already mapped
+    blocks are the arrays of the meshes followed by the layout of the meshes and of the instance groups
+    instances are rebuilt around their shared template, positions and scales
+    vertices, normals, positions and scales written to the shared arrays later are seen by the meshes
+    """
+    global worker_generation, worker_memory, worker_meshes
+    if generation == worker_generation:
+        return
+    worker_meshes = []
+    for memory in worker_memory:
+        memory.close()
+    worker_memory = [shared_memory.SharedMemory(name=name) for name, _, _ in blocks]
+    arrays = [np.ndarray(shape, dtype=dtype, buffer=memory.buf) for memory, (_, shape, dtype) in zip(worker_memory, blocks)]
+    vertices, edges, face_indices, face_offsets, face_normals, positions, scales, mesh_layout, groups = arrays
+    for v1, v2, e1, e2, i1, i2, o1, o2, n1, n2, closed in mesh_layout.tolist():
+        worker_meshes.append(Mesh.from_packed(vertices[v1:v2], edges[e1:e2], face_indices[i1:i2], face_offsets[o1:o2], bool(closed), face_normals[n1:n2]))
+    templates = list(worker_meshes)
+    for template, p1, p2 in groups.tolist():
+        instances = Instances(templates[template], positions[p1:p2], scales[p1:p2])
+        instances.scales = scales[p1:p2]
+        worker_meshes.extend(instances.members)
+    worker_generation = generation
+
+def render_shared(scene, state, indices, bounds, cull_back_faces, outlines, inside):
+    """
+    renders the shared meshes with the given indices in a worker process
+    """
+    share_scene(*scene)
+    return state_camera(state).render_meshes([worker_meshes[i] for i in indices], bounds, cull_back_faces, None, outlines, inside)
+
+def camera_state(camera):
+    return tuple(camera.position), (camera.rotation.a, camera.rotation.b), camera.fov, camera.clipping_planes
+
+def state_camera(state):
+    from core.world import WorldPoint
+    from core.rotation import Rotation
+    position, (a, b), fov, clipping_planes = state
+    camera = Camera()
+    camera.position = WorldPoint(*position)
+    camera.rotation = Rotation(a, b)
+    camera.fov = fov
+    camera.clipping_planes = clipping_planes
+    return camera
+
+class ParallelRenderer:
+    """
+    splits Camera.render_meshes into batches of meshes rendered by a pool of workers
+    threads work on the meshes directly since the work is done in NumPy
+    processes read the meshes set with set_scene from shared memory, only the
+    camera and mesh indices are sent every frame, a frame with a mesh that was not set
+    is rendered in the calling process instead and counted in fallbacks
+    the result is exactly the same as rendering everything at once
+    """
+    def __init__(self, workers=None, processes=False):
+        self.workers = workers if workers else os.cpu_count()
+        self.processes = processes
+        self.pool = None
+        self.memory = []
+        self.arrays = []
+        self.layout = None
+        self.scene = None
+        self.generation = 0
+        self.indices = {}
+        self.meshes = []
+        self.groups = {}
+        self.fallbacks = 0
+        if not processes:
+            self.pool = ThreadPoolExecutor(self.workers)
+
+    def __repr__(self):
+        return f"ParallelRenderer(workers: {self.workers}, processes: {self.processes})"
+
+    def set_scene(self, meshes):
+        """
+        copies the meshes to shared memory, only needed with processes,
+        meshes not set here are rendered in the calling process
+        of instances the template is shared once together with the positions and
+        scales of all copies, the workers expand them like the calling process does
+        the shared memory is kept if the meshes have the same sizes as the ones already
+        shared, the arrays are then overwritten in place, otherwise it is created again
+        as a new generation of the scene that the workers map on their next task,
+        the process pool is never restarted
+        """
+        if not self.processes:
+            return
+        shared = [mesh for mesh in meshes if isinstance(mesh, Mesh)]
+        groups = list({id(mesh.instances): mesh.instances for mesh in meshes if isinstance(mesh, Instance)}.values())
+        layout = []
+        v = e = i = o = n = 0
+        for mesh in shared + [instances.template for instances in groups]:
+            sizes = (len(mesh.vertices), len(mesh.edges), len(mesh.face_indices), len(mesh.face_offsets), len(mesh.face_normals))
+            layout.append(((v, v + sizes[0]), (e, e + sizes[1]), (i, i + sizes[2]), (o, o + sizes[3]), (n, n + sizes[4]), mesh.closed))
+            v, e, i, o, n = v + sizes[0], e + sizes[1], i + sizes[2], o + sizes[3], n + sizes[4]
+        group_layout = []
+        p = 0
+        for g, instances in enumerate(groups):
+            group_layout.append((len(shared) + g, (p, p + len(instances))))
+            p += len(instances)
+        meshes = shared + [instances.template for instances in groups]
+        arrays = [
+            np.concatenate([mesh.vertices for mesh in meshes] + [np.zeros((0, 3))]),
+            np.concatenate([mesh.edges for mesh in meshes] + [np.zeros((0, 2), dtype=np.int64)]),
+            np.concatenate([mesh.face_indices for mesh in meshes] + [np.zeros(0, dtype=np.int64)]),
+            np.concatenate([mesh.face_offsets for mesh in meshes] + [np.zeros(0, dtype=np.int64)]),
+            np.concatenate([mesh.face_normals for mesh in meshes] + [np.zeros((0, 3))]),
+            np.concatenate([instances.positions for instances in groups] + [np.zeros((0, 3))]),
+            np.concatenate([instances.scales for instances in groups] + [np.zeros(0)])
+        ]
+        layout = (layout, group_layout)
+        if self.memory and layout == self.layout:
+            for array, values in zip(self.arrays, arrays):
+                array[:] = values
+        else:
+            # the workers map the new blocks before rendering, the old ones are freed once they let go of them
+            self.release()
+            arrays.append(np.array([sum(ranges, ()) + (closed,) for *ranges, closed in layout[0]], dtype=np.int64).reshape(-1, 11))
+            arrays.append(np.array([(template, p1, p2) for template, (p1, p2) in group_layout], dtype=np.int64).reshape(-1, 3))
+            blocks = []
+            for values in arrays:
+                memory = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                array = np.ndarray(values.shape, dtype=values.dtype, buffer=memory.buf)
+                array[:] = values
+                self.memory.append(memory)
+                self.arrays.append(array)
+                blocks.append((memory.name, values.shape, values.dtype.str))
+            self.layout = layout
+            self.generation += 1
+            self.scene = (self.generation, blocks)
+            if not self.pool:
+                self.pool = ProcessPoolExecutor(self.workers)
+        self.indices = {id(mesh): i for i, mesh in enumerate(shared)}
+        first = len(layout[0])
+        for instances, (_, (p1, _)) in zip(groups, group_layout):
+            self.indices.update((id(member), first + p1 + k) for k, member in enumerate(instances.members))
+        self.meshes = shared
+        self.groups = {id(instances): (instances, p1) for instances, (_, (p1, _)) in zip(groups, group_layout)}
+
+    def update_meshes(self, meshes):
+        """
+        writes the vertices and normals of shared meshes that moved, or the position and scale
+        of shared instances, into the shared memory in place
+        returns False if one of them is not shared or changed its size, set_scene is needed then
+        """
+        if not self.processes:
+            return True
+        if not self.memory:
+            return False
+        vertices, face_normals, positions, scales = self.arrays[0], self.arrays[4], self.arrays[5], self.arrays[6]
+        for mesh in meshes:
+            if isinstance(mesh, Instance):
+                instances, p1 = self.groups.get(id(mesh.instances), (None, 0))
+                if instances is not mesh.instances:
+                    return False
+                positions[p1 + mesh.index] = instances.positions[mesh.index]
+                scales[p1 + mesh.index] = instances.scales[mesh.index]
+                continue
+            i = self.indices.get(id(mesh))
+            if i is None or i >= len(self.meshes) or self.meshes[i] is not mesh:
+                return False
+            (v1, v2), _, _, _, (n1, n2), _ = self.layout[0][i]
+            if len(mesh.vertices) != v2 - v1 or len(mesh.face_normals) != n2 - n1:
+                return False
+            vertices[v1:v2] = mesh.vertices
+            face_normals[n1:n2] = mesh.face_normals
+        return True
+
+    def close(self):
+        if self.pool:
+            self.pool.shutdown()
+            self.pool = None
+        self.release()
+
+    def release(self):
+        """
+        frees the shared memory of the scene
+        """
+        self.arrays = []
+        for memory in self.memory:
+            memory.close()
+            memory.unlink()
+        self.memory = []
+        self.layout = None
+        self.scene = None
+        self.indices = {}
+        self.meshes = []
+        self.groups = {}
+
+    def batches(self, meshes):
+        """
+        consecutive ranges of meshes with about the same number of vertices
+        """
+        sizes = np.cumsum([mesh.vertex_count for mesh in meshes])
+        count = min(len(meshes), 2 * self.workers)
+        if count == 0:
+            return []
+        cuts = np.searchsorted(sizes, sizes[-1] * np.arange(1, count) / count).tolist()
+        bounds = sorted(set([0] + cuts + [len(meshes)]))
+        return list(zip(bounds, bounds[1:]))
+
+    def render_meshes(self, camera, meshes, bounds, cull_back_faces=True, profiler=None, outlines=None, inside=None):
+        """
+        same as camera.render_meshes with the work split across the pool
+        workers transform, clip and project together so their time is charged to transform
+        """
+        outlines = [True] * len(meshes) if outlines is None else list(outlines)
+        inside = [False] * len(meshes) if inside is None else list(inside)
+        indices = [self.indices.get(id(mesh)) for mesh in meshes] if self.processes else []
+        if None in indices:
+            self.fallbacks += 1
+        if not self.pool or len(meshes) < 2 or None in indices:
+            return camera.render_meshes(meshes, bounds, cull_back_faces, profiler, outlines, inside)
+        camera.view()
+        ranges = self.batches(meshes)
+        if self.processes:
+            state = camera_state(camera)
+            futures = [self.pool.submit(render_shared, self.scene, state, indices[a:b], bounds, cull_back_faces, outlines[a:b], inside[a:b]) for a, b in ranges]
+        else:
+            futures = [self.pool.submit(camera.render_meshes, meshes[a:b], bounds, cull_back_faces, None, outlines[a:b], inside[a:b]) for a, b in ranges]
+        screen = ScreenGeometry.concatenate([future.result() for future in futures], [b - a for a, b in ranges], [sum(mesh.face_count for mesh in meshes[a:b]) for a, b in ranges])
+        if profiler:
+            profiler.mark("transform", sum(mesh.vertex_count for mesh in meshes))
+        return screen
@@ -0,0 +1,57 @@
+from collections import deque
+from time import perf_counter
+
+class Profiler:
+    """
+    rolling timings and primitive counters of the render pipeline stages
+    mark(stage) charges the time since the previous mark to stage
+    the last window frames are kept
+    """
+    STAGES = ("events", "simulation", "streaming", "culling", "transform", "clip", "perspective", "rasterization", "hud", "display update")
+
+    def __init__(self, window=120):
+        self.frames = deque(maxlen=window)
+        self.times = {}
+        self.counts = {}
+        self.last = perf_counter()
+
+    def __repr__(self):
+        return f"Profiler(frames: {len(self.frames)})"
+
+    def begin_frame(self):
+        self.times = dict.fromkeys(Profiler.STAGES, 0.0)
+        self.counts = dict.fromkeys(Profiler.STAGES, 0)
+        self.last = perf_counter()
+
+    def end_frame(self):
+        self.frames.append((self.times, self.counts))
+
+    def mark(self, stage, count=0):
+        """
+        charges the time since the previous mark to stage
+        and adds count processed primitives to it
+        """
+        now = perf_counter()
+        self.times[stage] = self.times.get(stage, 0.0) + now - self.last
+        self.counts[stage] = self.counts.get(stage, 0) + count
+        self.last = now
+
+    def skip(self):
+        """
+        ignores the time since the previous mark
+        """
+        self.last = perf_counter()
+
+    def summary(self):
+        """
+        mean milliseconds and primitive counts per frame of every stage
+        over the kept frames
+        """
+        n = len(self.frames)
+        result = {}
+        for stage in Profiler.STAGES:
+            result[stage] = {
+                "ms": 1000 * sum(times.get(stage, 0.0) for times, _ in self.frames) / n if n else 0.0,
+                "count": sum(counts.get(stage, 0) for _, counts in self.frames) / n if n else 0.0
+            }
+        return result
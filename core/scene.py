@@ -0,0 +1,194 @@
+from math import sin, cos
+import numpy as np
+from core.mesh import Mesh
+from core.rotation import Rotation
+
+def transform_matrix(position, rotation, scale):
+    """
+    4x4 matrix scaling by scale, then rotating by rotation and moving to position
+    alpha turns around the z axis, beta tilts the x axis up towards z, like the camera
+    """
+    sa, ca = sin(rotation.a), cos(rotation.a)
+    sb, cb = sin(rotation.b), cos(rotation.b)
+    matrix = np.identity(4)
+    matrix[:3, :3] = np.array([[ca, -sa, 0], [sa, ca, 0], [0, 0, 1]]) @ np.array([[cb, 0, -sb], [0, 1, 0], [sb, 0, cb]]) * scale
+    matrix[:3, 3] = tuple(position)
+    return matrix
+
+class SceneNode:
+    """
+    node of a scene graph with a transform relative to its parent
+    position, rotation and scale are the local transform, scale is uniform and positive
+    source is an optional Mesh in local coordinates, nodes without one only group their children
+    world is the cached matrix from local to world coordinates and mesh the source in world
+    coordinates, both are only recomputed by SceneGraph.update after the node or one of
+    its ancestors was changed, nodes with a mesh can be used as objects of the world
+    """
+    def __init__(self, source=None, position=(0, 0, 0), rotation=None, scale=1.0, name=None):
+        self.source = source
+        self.position = tuple(position)
+        self.rotation = rotation if rotation else Rotation(0, 0)
+        self.scale = scale
+        self.name = name
+        self.parent = None
+        self.children = []
+        self.graph = None
+        self.depth = 0
+        self.world = np.identity(4)
+        self.mesh = None
+        if source is not None:
+            self.mesh = Mesh.from_packed(source.vertices, source.edges, source.face_indices, source.face_offsets, source.closed, source.face_normals)
+        self.bounds_valid = False
+        self.subtree_bounds = (np.zeros(3), np.zeros(3))
+
+    def __repr__(self):
+        return f"SceneNode({self.name}, position: {self.position}, children: {len(self.children)})"
+
+    def add(self, child):
+        """
+        attaches child and its subtree to this node, returns the child
+        """
+        if child.parent:
+            child.parent.remove(child)
+        child.parent = self
+        self.children.append(child)
+        child.attach(self.graph, self.depth + 1)
+        child.mark()
+        return child
+
+    def remove(self, child):
+        self.children.remove(child)
+        child.parent = None
+        child.attach(None, 0)
+        self.invalidate_bounds()
+
+    def attach(self, graph, depth):
+        stack = [(self, depth)]
+        while stack:
+            node, depth = stack.pop()
+            node.graph = graph
+            node.depth = depth
+            stack.extend((child, depth + 1) for child in node.children)
+
+    def move_to(self, position):
+        self.position = tuple(position)
+        self.mark()
+
+    def rotate_to(self, rotation):
+        self.rotation = rotation
+        self.mark()
+
+    def scale_to(self, scale):
+        self.scale = scale
+        self.mark()
+
+    def mark(self):
+        """
+        marks the transform of the node as changed, its subtree is updated by the next SceneGraph.update
+        """
+        if self.graph:
+            self.graph.dirty.add(self)
+        self.invalidate_bounds()
+
+    def invalidate_bounds(self):
+        """
+        drops the cached bounds of the node and of its ancestors
+        an invalid node only has invalid ancestors, so the walk stops at the first one
+        """
+        self.bounds_valid = False
+        node = self.parent
+        while node and node.bounds_valid:
+            node.bounds_valid = False
+            node = node.parent
+
+    def local(self):
+        return transform_matrix(self.position, self.rotation, self.scale)
+
+    def update_mesh(self):
+        """
+        moves the world mesh to the current world matrix
+        normals are only rotated since the scale is uniform
+        """
+        linear = self.world[:3, :3]
+        scale = np.cbrt(np.linalg.det(linear))
+        self.mesh.vertices = self.source.vertices @ linear.T + self.world[:3, 3]
+        self.mesh.face_normals = self.source.face_normals @ (linear.T / scale) if scale else self.source.face_normals
+        self.mesh.update_bounds()
+
+    @property
+    def bounds(self):
+        """
+        world space bounding box of the meshes of the subtree, None if there are none
+        cached until a node of the subtree changes
+        """
+        if not self.bounds_valid:
+            boxes = [(self.mesh.minimum, self.mesh.maximum)] if self.mesh is not None else []
+            boxes.extend(box for box in (child.bounds for child in self.children) if box)
+            if boxes:
+                self.subtree_bounds = (np.minimum.reduce([low for low, _ in boxes]), np.maximum.reduce([high for _, high in boxes]))
+            else:
+                self.subtree_bounds = None
+            self.bounds_valid = True
+        return self.subtree_bounds
+
+    def nodes(self):
+        """
+        the node and all of its descendants, parents before children
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+class SceneGraph:
+    """
+    tree of SceneNode objects under a root node at the origin
+    changing the transform of a node marks it dirty, update recomputes the world matrices
+    and meshes of the dirty nodes and their descendants only, so animating a few nodes of
+    a large scene costs work proportional to the nodes that moved
+    """
+    def __init__(self):
+        self.dirty = set()
+        self.root = SceneNode(name="root")
+        self.root.graph = self
+
+    def __repr__(self):
+        return f"SceneGraph(nodes: {sum(1 for _ in self.root.nodes())}, dirty: {len(self.dirty)})"
+
+    def add(self, node, parent=None):
+        """
+        adds node under parent, the root by default, returns the node
+        """
+        return (parent if parent else self.root).add(node)
+
+    def objects(self):
+        """
+        the nodes having a mesh, to be used as the objects of the world
+        """
+        return [node for node in self.root.nodes() if node.mesh is not None]
+
+    def update(self):
+        """
+        recomputes the world matrices and meshes below every dirty node
+        returns the nodes with a mesh that moved
+        """
+        moved = []
+        done = set()
+        # shallow nodes first, a dirty node below one already updated is skipped
+        for top in sorted(self.dirty, key=lambda node: node.depth):
+            if top.graph is not self or top in done:
+                continue
+            stack = [top]
+            while stack:
+                node = stack.pop()
+                done.add(node)
+                node.world = node.parent.world @ node.local() if node.parent else node.local()
+                if node.mesh is not None:
+                    node.update_mesh()
+                    moved.append(node)
+                node.bounds_valid = False
+                stack.extend(node.children)
+            top.invalidate_bounds()
+        self.dirty.clear()
+        return moved
@@ -0,0 +1,76 @@
+import numpy as np
+from core.clipping import PackedPolygons
+
+class ScreenGeometry:
+    """
+    clipped primitives on the window ready to be drawn
+    polygons is PackedPolygons of window coordinates and depth (x, y, w)
+    lines is an array of shape (m, 2, 3) and points an array of shape (q, 3)
+    polygon_objects, line_objects and point_objects hold the index
+    of the rendered mesh every primitive belongs to, in ascending order
+    """
+    def __init__(self, polygons, polygon_objects, lines, line_objects, points, point_objects):
+        self.polygons = polygons
+        self.polygon_objects = polygon_objects
+        self.lines = lines
+        self.line_objects = line_objects
+        self.points = points
+        self.point_objects = point_objects
+
+    def __repr__(self):
+        return f"ScreenGeometry(polygons: {len(self.polygons)}, lines: {len(self.lines)}, points: {len(self.points)})"
+
+    def __len__(self):
+        return len(self.polygons) + len(self.lines) + len(self.points)
+
+    def ranges(self, objects):
+        """
+        start indices of the polygons, lines and points of every one of
+        the objects, each an array of length objects + 1
+        """
+        bins = np.arange(objects + 1)
+        return (
+            np.searchsorted(self.polygon_objects, bins),
+            np.searchsorted(self.line_objects, bins),
+            np.searchsorted(self.point_objects, bins)
+        )
+
+    def take(self, objects, count):
+        """
+        ScreenGeometry of the given ones of count objects in the given order,
+        they become objects 0 to len(objects) - 1
+        """
+        objects = np.asarray(objects, dtype=np.int64)
+        picked = []
+        for ranges in self.ranges(count):
+            starts, sizes = ranges[objects], ranges[objects + 1] - ranges[objects]
+            indices = np.repeat(starts - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+            picked.append((indices, np.repeat(np.arange(len(objects)), sizes)))
+        (polygons, polygon_objects), (lines, line_objects), (points, point_objects) = picked
+        return ScreenGeometry(self.polygons.take(polygons), polygon_objects, self.lines[lines], line_objects, self.points[points], point_objects)
+
+    @classmethod
+    def concatenate(cls, parts, object_counts, source_counts=None):
+        """
+        joins ScreenGeometry rendered from consecutive batches of meshes
+        object_counts holds the number of meshes of every batch
+        source_counts holds the number of faces of every batch, the sources of the polygons
+        are moved by them so they index the faces of all batches, without it every polygon
+        becomes its own source
+        """
+        bases = np.cumsum([0] + list(object_counts[:-1]), dtype=np.int64)
+        vertex_bases = np.cumsum([0] + [len(part.polygons.vertices) for part in parts[:-1]], dtype=np.int64)
+        sources = None
+        if source_counts is not None:
+            source_bases = np.cumsum([0] + list(source_counts[:-1]), dtype=np.int64)
+            sources = np.concatenate([part.polygons.sources + base for part, base in zip(parts, source_bases)] + [np.zeros(0, dtype=np.int64)])
+        polygons = PackedPolygons(
+            np.concatenate([part.polygons.vertices for part in parts]).reshape(-1, 3),
+            np.concatenate([[0]] + [part.polygons.offsets[1:] + base for part, base in zip(parts, vertex_bases)]),
+            sources
+        )
+        return cls(
+            polygons, np.concatenate([part.polygon_objects + base for part, base in zip(parts, bases)] + [np.zeros(0, dtype=np.int64)]),
+            np.concatenate([part.lines for part in parts]).reshape(-1, 2, 3), np.concatenate([part.line_objects + base for part, base in zip(parts, bases)] + [np.zeros(0, dtype=np.int64)]),
+            np.concatenate([part.points for part in parts]).reshape(-1, 3), np.concatenate([part.point_objects + base for part, base in zip(parts, bases)] + [np.zeros(0, dtype=np.int64)])
+        )
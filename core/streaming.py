@@ -0,0 +1,205 @@
+import logging
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from math import floor, ceil
+from time import monotonic
+import numpy as np
+from core.bvh import BVH
+from core.cube import unit_cube
+from core.instancing import Instances
+
+log = logging.getLogger(__name__)
+
+def object_bytes(objects):
+    """
+    approximate memory of the meshes of objects, arrays shared between them are counted once
+    """
+    arrays = {}
+    for obj in objects:
+        mesh = obj.mesh
+        instances = getattr(mesh, "instances", None)
+        if instances is not None:
+            mesh = instances.template
+            for array in (instances.positions, instances.scales, instances.minimums, instances.maximums, instances.centers, instances.radii):
+                arrays[id(array)] = array.nbytes
+        for array in (mesh.vertices, mesh.edges, mesh.face_indices, mesh.face_offsets, mesh.face_normals):
+            arrays[id(array)] = array.nbytes
+    return sum(arrays.values())
+
+class Tile:
+    """
+    loaded square of the world, the objects of the tile, their BVH and their memory in bytes
+    tiles are built by the worker threads of WorldStreamer, off the render thread
+    """
+    def __init__(self, key, objects):
+        self.key = key
+        self.objects = objects
+        self.bvh = BVH(objects)
+        self.bytes = object_bytes(objects)
+
+    def __repr__(self):
+        return f"Tile({self.key}, objects: {len(self.objects)}, bytes: {self.bytes})"
+
+class WorldStreamer:
+    """
+    pages square tiles of a large world in and out around a position
+    the world is split into tiles of size tile_size on the xy plane, source(key, tile_size)
+    returns the objects of the tile with integer coordinates key, like generated_tiles or directory_tiles
+    tiles within distance of the position are active, missing ones are loaded by worker threads
+    in the background and only become active when update is called between frames, so the
+    render thread never waits for a load and the active objects change all at once
+    entered and left hold the tiles that became active and inactive in the last update,
+    so the scene can be changed by them alone
+    a tile whose source raises is logged and dropped, it is requested again by an update
+    retry_delay seconds later, the delay doubling with every failure up to max_retry_delay
+    tiles that are no longer active stay loaded for when the position comes back
+    until their memory goes over budget bytes, then the least recently active ones are evicted
+    """
+    def __init__(self, source, tile_size=8.0, distance=8.0, budget=64 * 2 ** 20, workers=1, retry_delay=1.0, max_retry_delay=60.0):
+        self.source = source
+        self.tile_size = tile_size
+        self.distance = distance
+        self.budget = budget
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.pool = ThreadPoolExecutor(workers)
+        self.pending = {}
+        # failures in a row and the time to request again of the tiles whose last load failed
+        self.failures = {}
+        # loaded tiles from the least to the most recently active
+        self.tiles = OrderedDict()
+        self.active = []
+        self.entered = []
+        self.left = []
+        self.memory = 0
+        self.loaded = 0
+        self.evicted = 0
+        self.failed = 0
+
+    def __repr__(self):
+        return f"WorldStreamer(active: {len(self.active)}, loaded: {len(self.tiles)}, pending: {len(self.pending)}, memory: {self.memory})"
+
+    def stats(self):
+        return {"active": len(self.active), "loaded": len(self.tiles), "pending": len(self.pending), "memory": self.memory,
+                "tiles_loaded": self.loaded, "tiles_evicted": self.evicted, "tiles_failed": self.failed}
+
+    def close(self):
+        if self.pool:
+            for future in self.pending.values():
+                future.cancel()
+            self.pool.shutdown()
+            self.pool = None
+        self.pending = {}
+
+    def wanted(self, position):
+        """
+        keys of the tiles overlapping the square of side 2 * distance around position, nearest first
+        """
+        x, y = position[0], position[1]
+        s = self.tile_size
+        first = (floor((x - self.distance) / s), floor((y - self.distance) / s))
+        last = (ceil((x + self.distance) / s) - 1, ceil((y + self.distance) / s) - 1)
+        keys = [(i, j) for i in range(first[0], last[0] + 1) for j in range(first[1], last[1] + 1)]
+        return sorted(keys, key=lambda key: ((key[0] + 0.5) * s - x) ** 2 + ((key[1] + 0.5) * s - y) ** 2)
+
+    def update(self, position, block=False):
+        """
+        requests the tiles around position, takes in the finished ones and evicts over the budget
+        block waits for all requested tiles, for example before the first frame
+        returns whether the active tiles changed
+        """
+        keys = self.wanted(tuple(position))
+        wanted = set(keys)
+        for key, future in list(self.pending.items()):
+            if key not in wanted and future.cancel():
+                del self.pending[key]
+        now = monotonic()
+        for key in keys:
+            if key not in self.tiles and key not in self.pending and self.failures.get(key, (0, now))[1] <= now:
+                self.pending[key] = self.pool.submit(self.load, key)
+        if block:
+            wait(self.pending.values())
+        for key, future in list(self.pending.items()):
+            if future.done():
+                del self.pending[key]
+                try:
+                    tile = future.result()
+                except Exception:
+                    attempts = self.failures.get(key, (0, 0))[0] + 1
+                    delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+                    self.failures[key] = (attempts, monotonic() + delay)
+                    log.exception("loading tile %s failed %d times, retrying in %.1f s", key, attempts, delay)
+                    self.failed += 1
+                    continue
+                self.failures.pop(key, None)
+                self.tiles[key] = tile
+                self.memory += tile.bytes
+                self.loaded += 1
+        active = [key for key in keys if key in self.tiles]
+        for key in active:
+            self.tiles.move_to_end(key)
+        previous = set(self.active)
+        current = set(active)
+        # taken before evicting, a tile that left can be evicted right away
+        self.entered = [self.tiles[key] for key in active if key not in previous]
+        self.left = [self.tiles[key] for key in self.active if key not in current]
+        self.evict(wanted)
+        self.active = active
+        return bool(self.entered or self.left)
+
+    def load(self, key):
+        """
+        runs in a worker thread, the tile with its BVH
+        """
+        return Tile(key, self.source(key, self.tile_size))
+
+    def evict(self, wanted):
+        """
+        drops the least recently active tiles that are not wanted until the memory is within budget
+        """
+        for key in list(self.tiles):
+            if self.memory <= self.budget:
+                break
+            if key in wanted:
+                continue
+            self.memory -= self.tiles.pop(key).bytes
+            self.evicted += 1
+
+    def objects(self):
+        """
+        the objects of the active tiles
+        """
+        return [obj for key in self.active for obj in self.tiles[key].objects]
+
+    def bvh(self):
+        """
+        BVH of the objects of the active tiles in the order of objects, merged from the BVHs of the tiles
+        """
+        return BVH.merge([self.tiles[key].bvh for key in self.active])
+
+def generated_tiles(cubes=20, seed=0):
+    """
+    source of an endless world of instanced cubes, cubes random ones per tile
+    every tile is generated from its own seed, so it is the same whenever it is loaded again
+    """
+    template = unit_cube()
+    def generate(key, tile_size):
+        rng = random.Random(hash((seed, key)))
+        i, j = key
+        scene = [((i + rng.random()) * tile_size, (j + rng.random()) * tile_size, rng.uniform(-1, 2), rng.uniform(0.2, 1)) for _ in range(cubes)]
+        scene = np.array(scene).reshape(-1, 4)
+        return Instances(template, scene[:, :3], scene[:, 3]).objects()
+    return generate
+
+def directory_tiles(directory, cache=True):
+    """
+    source reading tile i, j from the scene manifest i_j.json in directory, see load_scene
+    missing tiles are empty
+    """
+    from core.loader import load_scene
+    def load(key, tile_size):
+        path = os.path.join(directory, "{}_{}.json".format(*key))
+        return load_scene(path, cache) if os.path.exists(path) else []
+    return load
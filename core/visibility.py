@@ -0,0 +1,109 @@
+import numpy as np
+from core.frustum import Frustum
+
+class VisibilityCache:
+    """
+    potentially visible set of objects reused across frames
+    on a miss the BVH is queried with the view frustum grown by a margin covering
+    every camera pose within move_threshold and turn_threshold of the current one
+    until the camera leaves that range or the scene changes only the objects of the
+    set are tested against the exact frustum, all at once
+    objects that moved are passed to update, which keeps the set instead of rebuilding it
+    hits and misses count the frames answered from the set and the rebuilds of it
+    """
+    def __init__(self, move_threshold=0.5, turn_threshold=0.05):
+        self.move_threshold = move_threshold
+        self.turn_threshold = turn_threshold
+        self.hits = 0
+        self.misses = 0
+        self.key = None
+        self.pose = None
+        self.frustum = None
+        self.objects = []
+        self.indices = {}
+        self.centers = np.zeros((0, 3))
+        self.radii = np.zeros(0)
+        self.total = 0
+
+    def __repr__(self):
+        return f"VisibilityCache(objects: {len(self.objects)}, hits: {self.hits}, misses: {self.misses})"
+
+    def stats(self):
+        """
+        hits, misses, hit rate and size of the cached set
+        """
+        frames = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / frames if frames else 0.0, "objects": len(self.objects)}
+
+    def invalidate(self):
+        self.key = None
+
+    def update(self, objects, bvh):
+        """
+        refreshes the set after objects of bvh moved
+        moved objects of the set get their new spheres, others are added if they entered
+        the grown frustum, so the set stays valid without querying the BVH again
+        """
+        if self.key is None or self.key[0] != id(bvh) or self.key[1] != len(bvh):
+            self.key = None
+            return
+        entered = []
+        for obj in objects:
+            i = self.indices.get(obj)
+            if i is not None:
+                self.centers[i] = obj.mesh.center
+                self.radii[i] = obj.mesh.radius
+            elif obj in bvh.slots and self.frustum.classify_sphere(tuple(obj.mesh.center), obj.mesh.radius) != Frustum.OUTSIDE:
+                entered.append(obj)
+        if entered:
+            # the set keeps the original order of the objects
+            self.set_objects(sorted(self.objects + entered, key=lambda obj: bvh.order[bvh.slots[obj]]))
+
+    def set_objects(self, objects):
+        self.objects = objects
+        self.indices = {obj: i for i, obj in enumerate(objects)}
+        self.centers = np.array([obj.mesh.center for obj in objects]).reshape(-1, 3)
+        self.radii = np.array([obj.mesh.radius for obj in objects])
+
+    def margin(self, camera, bounds):
+        """
+        how far a point in the frustum can move relative to the camera within the thresholds
+        a turn of t moves a point at distance r by at most r * t
+        """
+        min_x, min_y, max_x, max_y = bounds
+        k = camera.projection
+        far = camera.clipping_planes[1]
+        reach = far * np.sqrt(1 + (max(abs(min_x), abs(max_x)) / k) ** 2 + (max(abs(min_y), abs(max_y)) / k) ** 2)
+        return self.move_threshold + self.turn_threshold * reach
+
+    def close(self, camera):
+        """
+        whether the camera is still within the thresholds of the pose the set was built for
+        """
+        (x, y, z), (a, b) = self.pose
+        p = camera.position
+        moved = ((p.x - x) ** 2 + (p.y - y) ** 2 + (p.z - z) ** 2) ** 0.5
+        turned = abs(camera.rotation.a - a) + abs(camera.rotation.b - b)
+        return moved <= self.move_threshold and turned <= self.turn_threshold
+
+    def query(self, camera, bounds, bvh, version=0):
+        """
+        objects not rejected by the frustum of the window rectangle bounds in their original order,
+        whether each of them is completely inside of it and the number of culled objects
+        version identifies the state of the scene, a different one rebuilds the set
+        """
+        camera.view()
+        frustum = camera.frustum(*bounds)
+        key = (id(bvh), len(bvh), version, tuple(bounds), camera.fov, tuple(camera.clipping_planes))
+        if key == self.key and self.close(camera):
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.key = key
+            self.pose = (tuple(camera.position), (camera.rotation.a, camera.rotation.b))
+            self.frustum = frustum.grown(self.margin(camera, bounds))
+            self.set_objects(bvh.query(self.frustum)[0])
+            self.total = len(bvh)
+        sides = frustum.classify_spheres(self.centers, self.radii)
+        visible = np.nonzero(sides != Frustum.OUTSIDE)[0]
+        return [self.objects[i] for i in visible.tolist()], (sides[visible] == Frustum.INSIDE).tolist(), self.total - len(visible)
@@ -0,0 +1,180 @@
+import numpy as np
+from core.mesh import Mesh
+
+def greedy_rectangles(mask):
+    """
+    covers the true cells of a 2d boolean mask with few rectangles
+    yields (u, v, height, width) for rows u to u + height and columns v to v + width
+    """
+    mask = mask.copy()
+    rows, columns = mask.shape
+    for u, v in zip(*np.nonzero(mask)):
+        if not mask[u, v]:
+            continue
+        width = 1
+        while v + width < columns and mask[u, v + width]:
+            width += 1
+        height = 1
+        while u + height < rows and mask[u + height, v:v + width].all():
+            height += 1
+        mask[u:u + height, v:v + width] = False
+        yield int(u), int(v), height, width
+
+class Chunk:
+    """
+    SIZE x SIZE x SIZE cells of a VoxelWorld
+    key is the chunk coordinates, cells is the occupancy array
+    the mesh is only rebuilt after cells of the chunk or of its neighbours changed
+    """
+    SIZE = 16
+
+    def __init__(self, world, key):
+        self.world = world
+        self.key = key
+        self.cells = np.zeros((Chunk.SIZE,) * 3, dtype=bool)
+        self.dirty = True
+        self.built = None
+        self.rebuilds = 0
+
+    def __repr__(self):
+        return f"Chunk({self.key}, solid: {int(self.cells.sum())})"
+
+    def solid_boxes(self, minimum, maximum):
+        """
+        world space boxes of the solid cells of the chunk touching the box from minimum to maximum
+        used by SpatialGrid instead of the bounding box of the whole chunk
+        """
+        n = Chunk.SIZE
+        scale = self.world.scale
+        origin = np.array(self.key) * n
+        first = np.clip(np.floor(np.asarray(minimum) / scale).astype(np.int64) - origin, 0, n)
+        last = np.clip(np.floor(np.asarray(maximum) / scale).astype(np.int64) - origin + 1, 0, n)
+        cells = self.cells[first[0]:last[0], first[1]:last[1], first[2]:last[2]]
+        corners = ((np.argwhere(cells) + first + origin) * scale).tolist()
+        return [(tuple(low), (low[0] + scale, low[1] + scale, low[2] + scale)) for low in corners]
+
+    @property
+    def mesh(self):
+        if self.dirty:
+            self.built = self.world.build_mesh(self)
+            self.dirty = False
+            self.rebuilds += 1
+        return self.built
+
+class VoxelWorld:
+    """
+    world of unit cubes of size scale stored in chunks of occupancy data
+    every chunk is drawn as one merged mesh without the faces between
+    neighbouring solid cells, coplanar faces are merged into larger quads
+    """
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.chunks = {}
+
+    def __repr__(self):
+        return f"VoxelWorld(chunks: {len(self.chunks)}, scale: {self.scale})"
+
+    def chunk(self, key, create=False):
+        if create and key not in self.chunks:
+            self.chunks[key] = Chunk(self, key)
+        return self.chunks.get(key)
+
+    def fill(self, minimum, maximum, solid=True):
+        """
+        sets the cells from minimum to maximum, maximum excluded
+        marks the touched chunks and their neighbours for rebuilding
+        """
+        minimum = np.asarray(minimum)
+        maximum = np.asarray(maximum)
+        first = minimum // Chunk.SIZE
+        last = (maximum - 1) // Chunk.SIZE
+        for cx in range(first[0], last[0] + 1):
+            for cy in range(first[1], last[1] + 1):
+                for cz in range(first[2], last[2] + 1):
+                    origin = np.array((cx, cy, cz)) * Chunk.SIZE
+                    start = np.maximum(minimum - origin, 0)
+                    end = np.minimum(maximum - origin, Chunk.SIZE)
+                    chunk = self.chunk((cx, cy, cz), create=solid)
+                    if chunk is None:
+                        continue
+                    chunk.cells[start[0]:end[0], start[1]:end[1], start[2]:end[2]] = solid
+                    self.touch((cx, cy, cz))
+
+    def set(self, x, y, z, solid=True):
+        self.fill((x, y, z), (x + 1, y + 1, z + 1), solid)
+
+    def get(self, x, y, z):
+        chunk = self.chunks.get((x // Chunk.SIZE, y // Chunk.SIZE, z // Chunk.SIZE))
+        return bool(chunk and chunk.cells[x % Chunk.SIZE, y % Chunk.SIZE, z % Chunk.SIZE])
+
+    def touch(self, key):
+        """
+        marks the chunk and its face neighbours for rebuilding
+        """
+        x, y, z = key
+        for neighbour in ((x, y, z), (x - 1, y, z), (x + 1, y, z), (x, y - 1, z), (x, y + 1, z), (x, y, z - 1), (x, y, z + 1)):
+            if neighbour in self.chunks:
+                self.chunks[neighbour].dirty = True
+
+    def padded_cells(self, chunk):
+        """
+        cells of the chunk with a one cell border taken from the neighbouring chunks
+        """
+        n = Chunk.SIZE
+        padded = np.zeros((n + 2,) * 3, dtype=bool)
+        padded[1:-1, 1:-1, 1:-1] = chunk.cells
+        x, y, z = chunk.key
+        for axis in range(3):
+            for side, source, target in ((-1, n - 1, 0), (1, 0, n + 1)):
+                key = [x, y, z]
+                key[axis] += side
+                neighbour = self.chunks.get(tuple(key))
+                if neighbour is None:
+                    continue
+                inner = [slice(1, -1)] * 3
+                inner[axis] = target
+                cells = [slice(None)] * 3
+                cells[axis] = source
+                padded[tuple(inner)] = neighbour.cells[tuple(cells)]
+        return padded
+
+    def build_mesh(self, chunk):
+        """
+        merged mesh of the exposed faces of the chunk
+        """
+        n = Chunk.SIZE
+        padded = self.padded_cells(chunk)
+        origin = np.array(chunk.key) * n
+        vertices = []
+        edges = []
+        faces = []
+        for axis in range(3):
+            # the other two axes in cyclic order so that u x v points along axis
+            u_axis, v_axis = (axis + 1) % 3, (axis + 2) % 3
+            for side in (-1, 1):
+                neighbour = [slice(1, -1)] * 3
+                neighbour[axis] = slice(1 + side, n + 1 + side)
+                exposed = chunk.cells & ~padded[tuple(neighbour)]
+                # put axis first and u, v after it
+                exposed = np.transpose(exposed, (axis, u_axis, v_axis))
+                for layer in np.nonzero(exposed.any(axis=(1, 2)))[0]:
+                    plane = layer + (side > 0)
+                    for u, v, height, width in greedy_rectangles(exposed[layer]):
+                        corners = [(u, v), (u + height, v), (u + height, v + width), (u, v + width)]
+                        if side < 0:
+                            corners.reverse()
+                        base = len(vertices)
+                        for cu, cv in corners:
+                            point = [0, 0, 0]
+                            point[axis], point[u_axis], point[v_axis] = plane, cu, cv
+                            vertices.append(point)
+                        faces.append((base, base + 1, base + 2, base + 3))
+                        edges.extend(((base, base + 1), (base + 1, base + 2), (base + 2, base + 3), (base + 3, base)))
+        vertices = (np.array(vertices, dtype=float).reshape(-1, 3) + origin) * self.scale
+        return Mesh(vertices, edges, faces)
+
+    def objects(self):
+        """
+        chunks that have anything to draw, in a fixed order
+        """
+        return [self.chunks[key] for key in sorted(self.chunks) if self.chunks[key].mesh.face_count]
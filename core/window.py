@@ -1,3 +1,5 @@
+import numpy as np
+
 class WindowPoint:
     """
     point on the window
@@ -6,7 +8,10 @@ class WindowPoint:
     (0.5, 0): middle of the right border
     (-0.5, 0): middle of the left border
     (0, 0.5): probably a bit above middle of top border
+    augmented assignments modify the point in place
     """
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -21,16 +26,28 @@ class WindowPoint:
         return WindowPoint(self.x + other.x, self.y + other.y)
     
     def __sub__(self, other):
-        return self + (-other)
+        return WindowPoint(self.x - other.x, self.y - other.y)
     
     def __neg__(self):
         return WindowPoint(-self.x, -self.y)
 
     def __iadd__(self, other):
-        return self + other
+        self.x += other.x
+        self.y += other.y
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        return self
     
     def __mul__(self, other):
         return WindowPoint(other * self.x, other * self.y)
+
+    def __imul__(self, other):
+        self.x *= other
+        self.y *= other
+        return self
     
     def code(self, min_x, min_y, max_x, max_y):
         """
@@ -51,6 +68,8 @@ class WindowPoint:
         return self if min_x < self.x < max_x and min_y < self.y < max_y else None
 
 class WindowLine:
+    __slots__ = ("p1", "p2")
+
     def __init__(self, p1, p2):
         """
         line on the window
@@ -70,18 +89,18 @@ class WindowLine:
         intersection point with the line x = a
         """
         dx, dy = self.p2 - self.p1
-        s = dy / dx if dx else 1000
-        y = self.p1.y + (a - self.p1.x) * s
-        return WindowPoint(a, y)
+        # a line parallel to x = a has no single intersection, its start is used
+        t = (a - self.p1.x) / dx if dx else 0
+        return WindowPoint(a, self.p1.y + t * dy)
     
     def intersection_y(self, b):
         """
         intersection point with the line y = b
         """
         dx, dy = self.p2 - self.p1
-        s = dx / dy if dy else 1000
-        x = self.p1.x + (b - self.p1.y) * s
-        return WindowPoint(x, b)
+        # a line parallel to y = b has no single intersection, its start is used
+        t = (b - self.p1.y) / dy if dy else 0
+        return WindowPoint(self.p1.x + t * dx, b)
     
     def clipped(self, min_x, min_y, max_x, max_y):
         """
@@ -125,10 +144,10 @@ class WindowLine:
         # rerun the algorithm to remove all overflowed line parts
         cc1 = p1.code(min_x, min_y, max_x, max_y)
         cc2 = p2.code(min_x, min_y, max_x, max_y)
-        if c1 == 0 and c2 == 0:
+        if cc1 == 0 and cc2 == 0:
             # newly constructed line is visible
             return WindowLine(p1, p2)
-        if c1 & c2 != 0:
+        if cc1 & cc2 != 0:
             # newly constructed line is invisible
             return
         
@@ -149,17 +168,19 @@ class WindowLine:
         # find clipped p2
         pp2 = p2
         if cc2 & 8:
-            pp2 = self.intersection_y(max_y)
+            pp2 = line.intersection_y(max_y)
         elif cc2 & 4:
-            pp2 = self.intersection_y(min_y)
+            pp2 = line.intersection_y(min_y)
         elif cc2 & 2:
-            pp2 = self.intersection_x(max_x)
+            pp2 = line.intersection_x(max_x)
         elif cc2 & 1:
-            pp2 = self.intersection_x(min_x)
+            pp2 = line.intersection_x(min_x)
         
-        return WindowPoint(pp1, pp2)
+        return WindowLine(pp1, pp2)
 
 class WindowPolygon:
+    __slots__ = ("vertices",)
+
     def __init__(self, vertices):
         """
         polygon on the window
@@ -260,3 +281,55 @@ class WindowPolygon:
         clipped_polygon = self.clip_min_x(min_x).clip_min_y(min_y).clip_max_x(max_x).clip_max_y(max_y)
         return clipped_polygon if len(clipped_polygon.vertices) > 2 else None
 
+class WindowPointArray:
+    """
+    many points on the window stored contiguously
+    data is a float array of shape (n, 2)
+    augmented assignments modify the array in place
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=float).reshape(-1, 2)
+
+    def __repr__(self):
+        return f"WindowPointArray({len(self)} points)"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __getitem__(self, i):
+        return WindowPoint(*self.data[i].tolist())
+
+    def __setitem__(self, i, point):
+        self.data[i] = tuple(point)
+
+    def __iter__(self):
+        return (WindowPoint(x, y) for x, y in self.data.tolist())
+
+    def __iadd__(self, other):
+        self.data += tuple(other) if isinstance(other, WindowPoint) else np.asarray(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= tuple(other) if isinstance(other, WindowPoint) else np.asarray(other)
+        return self
+
+    def __imul__(self, other):
+        self.data *= other
+        return self
+
+    @classmethod
+    def from_points(cls, points):
+        return cls([tuple(p) for p in points])
+
+    def clipped(self, min_x, min_y, max_x, max_y):
+        """
+        points strictly inside the rectangle defined by the lines
+        x = min_x, y = min_y, x = max_x, y = max_y
+        """
+        x, y = self.data[:, 0], self.data[:, 1]
+        return WindowPointArray(self.data[(min_x < x) & (x < max_x) & (min_y < y) & (y < max_y)])
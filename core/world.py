@@ -1,9 +1,13 @@
 from math import sin, cos
+import numpy as np
 
 class WorldPoint:
     """
     point in the world
+    augmented assignments modify the point in place
     """
+    __slots__ = ("x", "y", "z")
+
     def __init__(self, x, y, z):
         self.x = x
         self.y = y
@@ -19,13 +23,22 @@ class WorldPoint:
         return WorldPoint(self.x + other.x, self.y + other.y, self.z + other.z)
     
     def __sub__(self, other):
-        return self + (-other)
+        return WorldPoint(self.x - other.x, self.y - other.y, self.z - other.z)
     
     def __neg__(self):
         return WorldPoint(-self.x, -self.y, -self.z)
 
     def __iadd__(self, other):
-        return self + other
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        return self
     
     def rotate_z(self, a):
         """
@@ -53,6 +66,8 @@ class WorldLine:
     line in the world
     endpoints are WorldPoint
     """
+    __slots__ = ("p1", "p2")
+
     def __init__(self, p1, p2):
         self.p1 = p1
         self.p2 = p2
@@ -65,11 +80,9 @@ class WorldLine:
         intersection point with the plane x = a
         """
         dx, dy, dz = self.p2 - self.p1
-        syx = dy / dx if dx else 1000
-        szx = dz / dx if dx else 1000
-        y = self.p1.y + (a - self.p1.x) * syx
-        z = self.p1.z + (a - self.p1.x) * szx
-        return WorldPoint(a, y, z)
+        # a line parallel to the plane has no single intersection, its start is used
+        t = (a - self.p1.x) / dx if dx else 0
+        return WorldPoint(a, self.p1.y + t * dy, self.p1.z + t * dz)
     
     def clipped(self, near, far):
         """
@@ -109,6 +122,8 @@ class WorldPolygon:
     polygon in the world
     vertices are WorldPoint
     """
+    __slots__ = ("vertices",)
+
     def __init__(self, vertices):
         self.vertices = vertices
     
@@ -169,3 +184,60 @@ class WorldPolygon:
         # polygon needs to be clipped
         clipped_polygon = self.clip_min_x(near).clip_max_x(far)
         return clipped_polygon if len(clipped_polygon.vertices) > 2 else None
+
+class WorldPointArray:
+    """
+    many points in the world stored contiguously
+    data is a float array of shape (n, 3)
+    augmented assignments modify the array in place
+    """
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=float).reshape(-1, 3)
+
+    def __repr__(self):
+        return f"WorldPointArray({len(self)} points)"
+
+    def __len__(self):
+        return len(self.data)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.data if dtype is None else self.data.astype(dtype)
+
+    def __getitem__(self, i):
+        return WorldPoint(*self.data[i].tolist())
+
+    def __setitem__(self, i, point):
+        self.data[i] = tuple(point)
+
+    def __iter__(self):
+        return (WorldPoint(x, y, z) for x, y, z in self.data.tolist())
+
+    def __iadd__(self, other):
+        self.data += tuple(other) if isinstance(other, WorldPoint) else np.asarray(other)
+        return self
+
+    def __isub__(self, other):
+        self.data -= tuple(other) if isinstance(other, WorldPoint) else np.asarray(other)
+        return self
+
+    @classmethod
+    def from_points(cls, points):
+        return cls([tuple(p) for p in points])
+
+    def rotate_z(self, a):
+        """
+        rotates every point around z axis
+        a is the rotation angle in radians
+        """
+        s, c = sin(a), cos(a)
+        return WorldPointArray(self.data @ np.array([[c, s, 0], [-s, c, 0], [0, 0, 1]]))
+
+    def rotate_y(self, a):
+        """
+        rotates every point around y axis
+        a is the rotation angle in radians
+        """
+        s, c = sin(a), cos(a)
+        return WorldPointArray(self.data @ np.array([[c, 0, -s], [0, 1, 0], [s, 0, c]]))
@@ -1,74 +1,513 @@
+import os
+import sys
+import numpy as np
 import pygame
 from pygame.locals import *
-import sys
 from display.colors import *
 from display.player import Player
 from core.camera import Camera
+from core.world import WorldPoint
+from core.rotation import Rotation
+from core.bvh import BVH
+from core.grid import SpatialGrid
+from core.profiler import Profiler
+from core.lod import LevelOfDetail
+from core.visibility import VisibilityCache
+from core.screen import ScreenGeometry
+from core.bsp import painter_order
+from display.hud import HUD
+from display.rasterizer import Rasterizer
 
 class App:
     FPS = 120
+    IDLE_WAIT = 10
+    MAX_FRAME_TIME = 0.25
+    HUD_POSITION = (10, 10)
+    CORNER_RADIUS = 3
 
-    def __init__(self, objects=None):
+    def __init__(self, objects=None, backface_culling=True, headless=False, size=None, lod=None, parallel=None, simulation_rate=120, max_fps=0, backend="draw", sprites=True, visibility=None, static=None, streamer=None):
+        """
+        headless renders into an offscreen surface of the given size
+        instead of opening a fullscreen window, for benchmarks and machines without a display
+        lod is the LevelOfDetail choosing how detailed objects are drawn, False draws everything in full
+        parallel is an optional ParallelRenderer splitting the geometry work across workers
+        the player is simulated simulation_rate times a second independent of the frame rate
+        and the camera is interpolated between the last two steps
+        max_fps caps the frame rate, 0 means no cap
+        backend "draw" draws with pygame.draw in object order, "raster" fills
+        a depth buffer with the NumPy Rasterizer so overlapping objects are correct
+        sprites blits the corners of every object from one cached dot surface in a single call
+        and draws connected edges as polylines instead of drawing every corner and edge on its own
+        visibility is the VisibilityCache reusing the visible objects across frames, False queries the BVH every frame
+        static is an optional BSPTree of static geometry, drawn back to front before the objects
+        streamer is an optional WorldStreamer, its active tiles replace the objects between frames
+        """
+        self.headless = headless
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
         pygame.init()
-        info = pygame.display.Info()
-        self.w = info.current_w
-        self.h = info.current_h
-        self.window = pygame.display.set_mode((self.w, self.h), FULLSCREEN)
+        if headless:
+            self.w, self.h = size if size else (1280, 720)
+            self.window = pygame.Surface((self.w, self.h))
+        else:
+            info = pygame.display.Info()
+            self.w = info.current_w
+            self.h = info.current_h
+            self.window = pygame.display.set_mode((self.w, self.h), FULLSCREEN)
         self.clock = pygame.time.Clock()
+        self.rasterizer = Rasterizer(self.w, self.h) if backend == "raster" else None
+        self.dot = self.corner_sprite() if sprites else None
+        self.draw_calls = 0
         self.camera = Camera()
         self.player = Player()
+        self.step = 1 / simulation_rate
+        self.max_fps = max_fps
+        # simulated pose of the player, the camera is interpolated from it
+        self.position = WorldPoint(0, 0, 0)
+        self.rotation = Rotation(0, 0)
+        self.previous_position = WorldPoint(0, 0, 0)
+        self.previous_rotation = Rotation(0, 0)
         self.objects = objects if objects else []
+        self.bvh = BVH(self.objects)
+        self.grid = SpatialGrid(self.objects)
+        self.backface_culling = backface_culling
+        self.lod = LevelOfDetail() if lod is None else lod
+        self.visibility = VisibilityCache() if visibility is None else visibility
+        self.static = static
+        self.streamer = streamer
+        # whether the grid holds exactly the objects of the active tiles, so it can follow them incrementally
+        self.streamed = False
+        self.parallel = parallel
+        if parallel:
+            parallel.set_scene([obj.mesh for obj in self.objects])
+        self.culled = 0
+        self.drawn = 0
+        self.profiler = Profiler()
+        self.hud = HUD()
         self.timer = 0
+        # state of the last presented frame, used to skip or partially redraw frames
+        self.redraw = True
+        self.changed = []
+        self.scene_version = 0
+        self.presented = None
+        self.hud_rects = []
+        self.last_hud_lines = []
+        self.last_visible = {}
+        self.last_count = 0
+        self.last_impostors = set()
+        self.last_screen = None
+        self.last_pixels = None
     
     def to_window_tuple(self, window_point):
         """
         converts WindowPoint to pygame window pixel coordinates
         """
         return window_point.x * self.w + 0.5 * self.w, -window_point.y * self.w + 0.5 * self.h
+
+    def to_window_array(self, window_points):
+        """
+        converts an array of shape (n, 2) of window coordinates to pygame window pixel coordinates
+        """
+        return window_points[:, :2] * (self.w, -self.w) + (0.5 * self.w, 0.5 * self.h)
     
     def handle_quit(self):
         """
         handles quit events, esc key and exit button
+        F3 toggles the performance hud
         """
         for event in pygame.event.get():
             if event.type == QUIT:
-                pygame.quit()
-                sys.exit()
+                self.quit()
             elif event.type == KEYDOWN:
                 if event.key == K_ESCAPE:
-                    pygame.quit()
-                    sys.exit()
+                    self.quit()
+                elif event.key == K_F3:
+                    self.hud.visible = not self.hud.visible
+        self.profiler.mark("events")
     
-    def draw_things(self):
+    def quit(self):
+        if self.parallel:
+            self.parallel.close()
+        if self.streamer:
+            self.streamer.close()
+        pygame.quit()
+        sys.exit()
+
+    def set_objects(self, objects):
+        """
+        replaces the objects of the scene
+        """
+        self.objects = objects
+        self.bvh = BVH(self.objects)
+        self.grid = SpatialGrid(self.objects)
+        self.streamed = False
+        if self.parallel:
+            self.parallel.set_scene([obj.mesh for obj in self.objects])
+        self.scene_version += 1
+        self.redraw = True
+
+    def update_object(self, obj):
+        """
+        marks obj as moved or changed after its mesh was modified
+        only its old and new area on the window is redrawn on the next frame
+        """
+        obj.mesh.update_bounds()
+        obj.mesh.update_normals()
+        self.update_objects([obj])
+
+    def update_objects(self, objects):
+        """
+        marks objects as moved whose meshes already have their new bounds and normals,
+        like the nodes returned by SceneGraph.update
+        the BVH is refitted and the grid updated only for them, objects not in the scene yet are added
+        """
+        if not objects:
+            return
+        self.objects.extend(obj for obj in objects if obj not in self.bvh.slots)
+        self.bvh.refit(objects)
+        for obj in objects:
+            self.grid.move(obj)
+        # only the moved meshes are written to the workers
+        if self.parallel and not self.parallel.update_meshes([obj.mesh for obj in objects]):
+            self.parallel.set_scene([obj.mesh for obj in self.objects])
+        self.changed.extend(objects)
+        if self.visibility:
+            self.visibility.update(objects, self.bvh)
+
+    def add_object(self, obj):
         """
-        draws objects on the window
+        adds obj to the scene, only its area on the window is redrawn on the next frame
         """
+        self.objects.append(obj)
+        self.bvh.insert(obj)
+        self.grid.insert(obj)
+        if self.parallel:
+            self.parallel.set_scene([obj.mesh for obj in self.objects])
+        self.changed.append(obj)
+        self.scene_version += 1
+
+    def stream(self):
+        """
+        swaps in the objects of the tiles the streamer finished loading around the camera
+        and drops the ones of the tiles it left
+        """
+        if not self.streamer:
+            return
+        self.profiler.skip()
+        if self.streamer.update(self.camera.position):
+            # only the objects of the tiles that changed move in the grid, once it holds the tiles,
+            # the BVH is merged from the ones the tiles were loaded with
+            objects = self.streamer.objects()
+            if self.streamed:
+                for tile in self.streamer.left:
+                    for obj in tile.objects:
+                        self.grid.remove(obj)
+                for tile in self.streamer.entered:
+                    for obj in tile.objects:
+                        self.grid.insert(obj)
+            else:
+                # the objects given before, which the tiles replace
+                self.grid = SpatialGrid(objects)
+                self.streamed = True
+            self.objects = objects
+            self.bvh = self.streamer.bvh()
+            if self.parallel:
+                self.parallel.set_scene([obj.mesh for obj in self.objects])
+            self.scene_version += 1
+            self.redraw = True
+        self.profiler.mark("streaming")
+
+    def draw_scene(self, clip=None):
+        """
+        draws objects on the window, only inside of the clip rectangle if given
+        """
+        self.window.set_clip(clip)
         self.window.fill(LIGHT_BLUE)
-        for obj in self.objects:
+        # objects outside of the visible part of the window are culled as a whole
+        bounds = (-0.5, -0.5 * self.h / self.w, 0.5, 0.5 * self.h / self.w)
+        if self.visibility:
+            visible, inside, self.culled = self.visibility.query(self.camera, bounds, self.bvh, self.scene_version)
+        else:
+            visible, self.culled = self.bvh.query(self.camera.frustum(*bounds))
+            inside = [False] * len(visible)
+        self.drawn = len(visible)
+        levels = self.lod.select(self.camera, visible) if self.lod else [LevelOfDetail.FULL] * len(visible)
+        rendered = [obj for obj, level in zip(visible, levels) if level != LevelOfDetail.IMPOSTOR]
+        impostors = [obj for obj, level in zip(visible, levels) if level == LevelOfDetail.IMPOSTOR]
+        self.profiler.mark("culling", len(visible) + self.culled)
+        outlines = [level == LevelOfDetail.FULL for level in levels if level != LevelOfDetail.IMPOSTOR]
+        # objects inside of the window are inside of the clipping bounds too
+        inside = [flag for flag, level in zip(inside, levels) if level != LevelOfDetail.IMPOSTOR]
+        meshes = [obj.mesh for obj in rendered]
+        bounds = (-1, -self.h / self.w, 1, self.h / self.w)
+        if self.parallel:
+            screen = self.parallel.render_meshes(self.camera, meshes, bounds, self.backface_culling, self.profiler, outlines, inside)
+        else:
+            screen = self.camera.render_meshes(meshes, bounds, self.backface_culling, self.profiler, outlines, inside)
+        static = 0
+        # index of the object of every rendered object in screen
+        positions = list(range(len(rendered)))
+        if self.static:
+            # every fragment of the static geometry is drawn as an object of its own
+            order = self.static.order(self.camera.position, self.backface_culling)
+            static_screen, static = self.static.render(self.camera, bounds, self.backface_culling, self.profiler, order)
+            screen = ScreenGeometry.concatenate([static_screen, screen], [static, len(rendered)])
+            if self.rasterizer:
+                # the depth buffer sorts out static geometry and objects
+                positions = [static + i for i in positions]
+                levels = [LevelOfDetail.FULL] * static + levels
+            else:
+                # without one objects are drawn between the fragments by their depth
+                fragment_depths = self.static.depths(self.camera.position, order)
+                object_depths = [float(np.linalg.norm(obj.mesh.center - tuple(self.camera.position))) for obj in rendered]
+                merged = painter_order(fragment_depths, object_depths)
+                rendered_levels = [LevelOfDetail.FULL] * static + [level for level in levels if level != LevelOfDetail.IMPOSTOR]
+                screen = screen.take(merged, len(merged))
+                positions = np.argsort(merged)[static:].tolist()
+                # impostors are far away, they are drawn first
+                levels = [LevelOfDetail.IMPOSTOR] * len(impostors) + [rendered_levels[i] for i in merged.tolist()]
+        impostor_rects, impostor_depths = self.impostor_rects(impostors)
+        pixels = self.screen_pixels(screen)
+        if self.rasterizer:
+            self.rasterize(screen, pixels, impostor_rects, impostor_depths, clip)
+        else:
+            self.draw_primitives(screen, pixels, levels, impostor_rects)
+        self.profiler.mark("rasterization", len(screen))
+        self.window.set_clip(None)
+        self.last_visible = {id(obj): position for obj, position in zip(rendered, positions)}
+        self.last_count = static + len(rendered)
+        self.last_impostors = {id(obj) for obj in impostors}
+        self.last_screen = screen
+        self.last_pixels = pixels
+
+    def draw_primitives(self, screen, pixels, levels, impostor_rects):
+        """
+        draws ScreenGeometry with pygame.draw, objects in order without depth test
+        draw_calls counts the pygame calls it made
+        """
+        impostor_rects = iter(impostor_rects)
+        polygon_pixels, line_pixels, point_pixels = (p.tolist() for p in pixels)
+        # top left corners of the dot sprites of all corners at once
+        # partly outside of the window a clipped sprite differs from a clipped circle, those corners are drawn as circles
+        r = App.CORNER_RADIUS
+        corners = np.floor(pixels[2]).astype(np.int64)
+        border = ((corners < r) | (corners > (self.w - 1 - r, self.h - 1 - r))).any(axis=1)
+        dots = [(self.dot, position) for position in (corners[~border] - r).tolist()] if self.dot else []
+        # start of the sprite corners and of the border corners of every point index
+        dot_starts = np.concatenate(([0], np.cumsum(~border))).tolist()
+        border_points = np.nonzero(border)[0].tolist()
+        border_starts = np.concatenate(([0], np.cumsum(border))).tolist()
+        # edges continuing where the previous one ended are drawn as one polyline
+        chained = np.zeros(len(line_pixels) + 1, dtype=bool)
+        if self.dot and len(line_pixels) > 1:
+            chained[1:-1] = (pixels[1][1:, 0] == pixels[1][:-1, 1]).all(axis=1)
+        chained = chained.tolist()
+        offsets = screen.polygons.offsets.tolist()
+        polygon_ranges, line_ranges, point_ranges = (r.tolist() for r in screen.ranges(len(levels) - levels.count(LevelOfDetail.IMPOSTOR)))
+        i = 0
+        calls = 0
+        for level in levels:
+            if level == LevelOfDetail.IMPOSTOR:
+                # far away objects are a single square
+                rect = next(impostor_rects)
+                if rect:
+                    pygame.draw.rect(self.window, YELLOW, rect)
+                    calls += 1
+                continue
             # draw faces
-            for polygon in obj.faces:
-                f = self.camera.render_polygon(polygon)
-                if f:
-                    clipped_f = f.clipped(-1, -self.h / self.w, 1, self.h / self.w)
-                    if clipped_f:
-                        pygame.draw.polygon(self.window, YELLOW, [self.to_window_tuple(p) for p in clipped_f.vertices])
+            for j in range(polygon_ranges[i], polygon_ranges[i + 1]):
+                pygame.draw.polygon(self.window, YELLOW, polygon_pixels[offsets[j]:offsets[j + 1]])
             # draw edges
-            for line in obj.edges:
-                l = self.camera.render_line(line)
-                if l:
-                    clipped_l = l.clipped(-1, -self.h / self.w, 1, self.h / self.w)
-                    if clipped_l:
-                        clipped_p1, clipped_p2 = clipped_l
-                        pygame.draw.line(self.window, BLACK, self.to_window_tuple(clipped_p1), self.to_window_tuple(clipped_p2))
+            j = line_ranges[i]
+            while j < line_ranges[i + 1]:
+                end = j + 1
+                while end < line_ranges[i + 1] and chained[end]:
+                    end += 1
+                if end - j > 1:
+                    pygame.draw.lines(self.window, BLACK, False, [line_pixels[j][0]] + [line_pixels[k][1] for k in range(j, end)])
+                else:
+                    pygame.draw.line(self.window, BLACK, *line_pixels[j])
+                calls += 1
+                j = end
             # draw corners
-            for point in obj.corners:
-                p = self.camera.render_point(point)
-                if p:
-                    clipped_p = p.clipped(-1, -self.h / self.w, 1, self.h / self.w)
-                    if clipped_p:
-                        pygame.draw.circle(self.window, BLACK, self.to_window_tuple(clipped_p), 3)
-        self.window.blit(pygame.font.Font(None, 32).render(str(int(App.FPS)), True, BLACK), (10, 10))
-        pygame.display.update()
+            if self.dot:
+                first, last = dot_starts[point_ranges[i]], dot_starts[point_ranges[i + 1]]
+                if first < last:
+                    self.window.blits(dots[first:last], False)
+                    calls += 1
+                for j in border_points[border_starts[point_ranges[i]]:border_starts[point_ranges[i + 1]]]:
+                    pygame.draw.circle(self.window, BLACK, point_pixels[j], r)
+                    calls += 1
+            else:
+                for j in range(point_ranges[i], point_ranges[i + 1]):
+                    pygame.draw.circle(self.window, BLACK, point_pixels[j], App.CORNER_RADIUS)
+                calls += point_ranges[i + 1] - point_ranges[i]
+            calls += polygon_ranges[i + 1] - polygon_ranges[i]
+            i += 1
+        self.draw_calls = calls
+
+    @staticmethod
+    def corner_sprite():
+        """
+        a filled circle of the corner radius on a transparent surface, drawn once and blitted for every corner
+        """
+        r = App.CORNER_RADIUS
+        sprite = pygame.Surface((2 * r + 1, 2 * r + 1))
+        sprite.fill(WHITE)
+        sprite.set_colorkey(WHITE)
+        pygame.draw.circle(sprite, BLACK, (r, r), r)
+        return sprite
+
+    def rasterize(self, screen, pixels, impostor_rects, impostor_depths, clip):
+        """
+        draws ScreenGeometry with the depth tested Rasterizer
+        """
+        polygon_pixels, line_pixels, point_pixels = pixels
+        self.rasterizer.begin(self.window, clip)
+        self.rasterizer.draw_polygons(polygon_pixels, screen.polygons.vertices[:, 2], screen.polygons.offsets, YELLOW)
+        self.rasterizer.draw_rects([r for r in impostor_rects if r], [d for r, d in zip(impostor_rects, impostor_depths) if r], YELLOW)
+        self.rasterizer.draw_lines(line_pixels, screen.lines[:, :, 2], BLACK)
+        self.rasterizer.draw_points(point_pixels, screen.points[:, 2], App.CORNER_RADIUS, BLACK)
+        self.rasterizer.end()
+
+    def impostor_rects(self, objects):
+        """
+        squares covering the projected bounding spheres of the objects and their depths
+        None for objects outside of the clipping planes
+        """
+        if not objects:
+            return [], []
+        centers = np.array([obj.mesh.center for obj in objects])
+        radii = np.array([obj.mesh.radius for obj in objects])
+        relative, window, visible = self.camera.transform_points(centers)
+        sizes = np.maximum(2 * self.camera.projection * radii / np.maximum(relative[:, 0], 1e-9) * self.w, 1)
+        corners = self.to_window_array(window) - sizes[:, None] / 2
+        rects = [pygame.Rect(x, y, size, size) if v else None for (x, y), size, v in zip(corners.tolist(), sizes.tolist(), visible.tolist())]
+        return rects, relative[:, 0].tolist()
+
+    def screen_pixels(self, screen):
+        """
+        pixel coordinates of the polygon vertices, line endpoints and points of ScreenGeometry
+        """
+        return (
+            self.to_window_array(screen.polygons.vertices),
+            self.to_window_array(screen.lines.reshape(-1, 3)).reshape(-1, 2, 2),
+            self.to_window_array(screen.points)
+        )
+
+    @staticmethod
+    def covered_rect(screen, pixels, i, count):
+        """
+        rectangle covered by the primitives of the i-th of count objects of ScreenGeometry
+        None if it has no primitives
+        """
+        polygon_ranges, line_ranges, point_ranges = screen.ranges(count)
+        offsets = screen.polygons.offsets
+        polygon_pixels, line_pixels, point_pixels = pixels
+        covered = np.concatenate((
+            polygon_pixels[offsets[polygon_ranges[i]]:offsets[polygon_ranges[i + 1]]],
+            line_pixels[line_ranges[i]:line_ranges[i + 1]].reshape(-1, 2),
+            point_pixels[point_ranges[i]:point_ranges[i + 1]]
+        ))
+        if not len(covered):
+            return
+        (x1, y1), (x2, y2) = np.floor(covered.min(axis=0)), np.ceil(covered.max(axis=0))
+        # corners are circles of the corner radius, with a pixel to spare
+        margin = App.CORNER_RADIUS + 1
+        return pygame.Rect(int(x1) - margin, int(y1) - margin, int(x2 - x1) + 2 * margin + 1, int(y2 - y1) + 2 * margin + 1)
+
+    def object_rect(self, obj):
+        """
+        rectangle the object covered on the window when the scene was last drawn
+        None if it was not drawn
+        """
+        i = self.last_visible.get(id(obj))
+        if i is not None:
+            return App.covered_rect(self.last_screen, self.last_pixels, i, self.last_count)
+
+    def draw_things(self):
+        """
+        draws objects on the window and presents the whole window
+        """
+        self.draw_scene()
+        self.hud_rects = self.draw_hud(self.hud_lines())
+        self.present()
+
+    def draw_frame(self):
+        """
+        draws only what changed since the last presented frame
+        the whole window when the camera moved, the old and new areas
+        of changed objects and of the hud text otherwise
+        nothing at all on idle frames
+        returns whether anything was drawn
+        """
+        self.camera.view()
+        state = (self.camera.rebuilds, self.backface_culling)
+        if any(id(obj) in self.last_impostors for obj in self.changed):
+            # impostor areas are not tracked
+            self.redraw = True
+        if self.redraw or state != self.presented:
+            self.draw_things()
+        else:
+            rects = [self.object_rect(obj) for obj in self.changed]
+            if self.changed:
+                screen = self.camera.render_meshes([obj.mesh for obj in self.changed], (-1, -self.h / self.w, 1, self.h / self.w), self.backface_culling)
+                pixels = self.screen_pixels(screen)
+                rects.extend(App.covered_rect(screen, pixels, i, len(self.changed)) for i in range(len(self.changed)))
+            lines = self.hud_lines()
+            if lines != self.last_hud_lines:
+                rects.extend(self.hud_rects)
+                rects.extend(self.hud.rects(lines, App.HUD_POSITION))
+            rects = [r for r in rects if r]
+            if not rects:
+                return False
+            clip = rects[0].unionall(rects[1:])
+            self.draw_scene(clip)
+            self.window.set_clip(clip)
+            self.hud_rects = self.draw_hud(lines)
+            self.window.set_clip(None)
+            self.present(rects)
+        self.redraw = False
+        self.changed = []
+        self.presented = state
+        return True
+
+    def present(self, rects=None):
+        """
+        shows the window, only the rectangles rects if given
+        the time since the scene was drawn went into the hud
+        """
+        self.profiler.mark("hud")
+        if not self.headless:
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+        self.profiler.mark("display update")
+
+    def hud_lines(self):
+        """
+        the fps counter and, if enabled, the per stage timings
+        """
+        lines = [str(int(App.FPS))]
+        if self.hud.visible:
+            lines.append(f"drawn: {self.drawn}  culled: {self.culled}")
+            if self.lod:
+                lines.append("detail: {}/{}/{}".format(*self.lod.counts))
+            if self.visibility:
+                lines.append(f"visibility hits: {self.visibility.hits}  misses: {self.visibility.misses}")
+            if self.streamer:
+                stats = self.streamer.stats()
+                lines.append("tiles: {active}/{loaded}  pending: {pending}  failed: {tiles_failed}  memory: {:.1f} MB".format(stats["memory"] / 2 ** 20, **stats))
+            lines.extend(HUD.profiler_lines(self.profiler))
+        return lines
+
+    def draw_hud(self, lines):
+        """
+        draws the hud lines and returns the rectangles they cover
+        """
+        self.last_hud_lines = lines
+        return self.hud.draw_lines(self.window, lines, App.HUD_POSITION)
 
     def handle_movement(self, dt):
         """
@@ -77,28 +516,70 @@ class App:
         keys = pygame.key.get_pressed()
         a = keys[K_a] - keys[K_d]
         b = keys[K_w] - keys[K_s]
-        self.camera.position += self.player.move(a, b, dt, self.camera.rotation.a)
+        self.position += self.collide(self.player.move(a, b, dt, self.rotation.a))[0]
+        # walking off an object starts a fall
+        if not self.player.jumping and self.position.z > 0 and not self.collide(WorldPoint(0, 0, -0.01))[1][2]:
+            self.player.fall()
     
     def handle_rotation(self, dt):
         """
         handles rotation based on mouse movements
         """
         a, b = pygame.mouse.get_rel()
-        self.camera.rotation += self.player.rotate(a, b, dt)
+        self.rotation += self.player.rotate(a, b, dt)
     
     def handle_jump(self, dt):
         """
         handles jumping and space key presses
         """
         space = pygame.key.get_pressed()[K_SPACE]
-        self.camera.position += self.player.jump(space, dt)
-        if self.camera.position.z < 0:
+        requested = self.player.jump(space, dt)
+        delta, blocked = self.collide(requested)
+        self.position += delta
+        if blocked[2]:
+            if requested.z < 0:
+                self.player.end_jump()
+            else:
+                self.player.bump()
+        if self.position.z < 0:
             self.player.end_jump()
-            self.camera.position.z = 0
+            self.position.z = 0
+
+    def collide(self, delta):
+        """
+        movement delta limited by the objects around the player box
+        returns the allowed delta as WorldPoint and for every axis whether it was blocked
+        """
+        if delta.x == 0 and delta.y == 0 and delta.z == 0:
+            return delta, [False, False, False]
+        size = Player.SIZE
+        p = self.position
+        moved, blocked = self.grid.sweep((p.x - size[0], p.y - size[1], p.z - size[2]), (p.x + size[0], p.y + size[1], p.z + size[2]), tuple(delta))
+        return WorldPoint(*moved), blocked
+
+    def simulate(self):
+        """
+        advances the player by one fixed step
+        """
+        self.previous_position = WorldPoint(*self.position)
+        self.previous_rotation = self.rotation
+        self.handle_movement(self.step)
+        self.handle_rotation(self.step)
+        self.handle_jump(self.step)
+
+    def interpolate(self, alpha):
+        """
+        places the camera alpha of the way from the previous to the current simulated pose
+        """
+        p, q = self.previous_position, self.position
+        self.camera.position = WorldPoint(p.x + (q.x - p.x) * alpha, p.y + (q.y - p.y) * alpha, p.z + (q.z - p.z) * alpha)
+        r, t = self.previous_rotation, self.rotation
+        self.camera.rotation = Rotation(r.a + (t.a - r.a) * alpha, r.b + (t.b - r.b) * alpha)
     
     def time_calculations(self):
         fps = self.clock.get_fps()
-        dt = self.clock.tick() * 0.001
+        # tick sleeps to keep the frame rate under max_fps
+        dt = self.clock.tick(self.max_fps) * 0.001
         self.timer += dt
         # update fps every second
         if self.timer > 1:
@@ -109,11 +590,24 @@ class App:
     def run(self):
         pygame.mouse.set_visible(False)
         pygame.event.set_grab(True)
+        self.position = WorldPoint(*self.camera.position)
+        self.rotation = self.camera.rotation
+        self.previous_position = WorldPoint(*self.position)
+        self.previous_rotation = self.rotation
+        accumulator = 0
         while True:
-            dt = self.time_calculations()
+            # a long stall is not caught up on, the simulation slows down instead
+            accumulator += min(self.time_calculations(), App.MAX_FRAME_TIME)
+            self.profiler.begin_frame()
             self.handle_quit()
-            self.draw_things()
-            self.handle_movement(dt)
-            self.handle_rotation(dt)
-            self.handle_jump(dt)
-            
+            while accumulator >= self.step:
+                self.simulate()
+                accumulator -= self.step
+            self.interpolate(accumulator / self.step)
+            self.profiler.mark("simulation")
+            self.stream()
+            if self.draw_frame():
+                self.profiler.end_frame()
+            else:
+                # nothing changed, no need to keep a core busy
+                pygame.time.wait(App.IDLE_WAIT)
@@ -0,0 +1,60 @@
+import pygame
+from display.colors import *
+
+class HUD:
+    """
+    text overlay drawn from glyphs rendered once and cached
+    """
+    def __init__(self, size=32, color=BLACK):
+        self.font = pygame.font.Font(None, size)
+        self.color = color
+        self.glyphs = {}
+        self.line_height = self.font.get_linesize()
+        self.visible = False
+
+    def glyph(self, character):
+        if character not in self.glyphs:
+            self.glyphs[character] = self.font.render(character, True, self.color)
+        return self.glyphs[character]
+
+    def rects(self, lines, position):
+        """
+        rectangles draw_lines would cover without drawing anything
+        """
+        x, y = position
+        rects = []
+        for line in lines:
+            rects.append(pygame.Rect(x, y, sum(self.glyph(c).get_width() for c in line), self.line_height))
+            y += self.line_height
+        return rects
+
+    def draw_text(self, surface, text, position):
+        """
+        blits text at position and returns the covered rectangle
+        """
+        x, y = position
+        glyphs = [self.glyph(c) for c in text]
+        blits = []
+        for g in glyphs:
+            blits.append((g, (x, y)))
+            x += g.get_width()
+        surface.blits(blits, False)
+        return pygame.Rect(position, (x - position[0], self.line_height))
+
+    def draw_lines(self, surface, lines, position):
+        """
+        blits lines of text below each other and returns the covered rectangles
+        """
+        x, y = position
+        rects = []
+        for line in lines:
+            rects.append(self.draw_text(surface, line, (x, y)))
+            y += self.line_height
+        return rects
+
+    @staticmethod
+    def profiler_lines(profiler):
+        """
+        one line per pipeline stage with its time and primitive count
+        """
+        return [f"{stage}: {values['ms']:.2f} ms  {values['count']:.0f}" for stage, values in profiler.summary().items()]
@@ -5,6 +5,8 @@ from core.rotation import Rotation
 class Player:
     G = 9.81
     VV = 5.0
+    # half size of the box around the camera that collides with objects
+    SIZE = (0.25, 0.25, 0.25)
     def __init__(self):
         self.velocity = 4.0
         self.sensitivity = 2.0
@@ -47,6 +49,19 @@ class Player:
         self.jumping = False
         self.vertical_velocity = Player.VV
 
+    def fall(self):
+        """
+        starts falling without jumping, after walking off an object
+        """
+        self.jumping = True
+        self.vertical_velocity = 0.0
+
+    def bump(self):
+        """
+        stops going up after hitting something above
+        """
+        self.vertical_velocity = min(self.vertical_velocity, 0.0)
+
     def jump(self, space, dt):
         if self.jumping:
             self.vertical_velocity -= dt * 9.81
@@ -0,0 +1,164 @@
+import numpy as np
+import pygame
+
+class Rasterizer:
+    """
+    software rasterizer writing straight into the pixels of a pygame surface
+    with a depth test against a buffer of inverse depths, 0 being infinitely far
+    triangles are filled by evaluating edge functions over their bounding boxes,
+    small triangles many at a time and large ones one at a time
+    lines and points are drawn with a small depth bias so edges win over their faces
+    """
+    TIERS = (4, 8, 16, 32)
+    BATCH = 1 << 20
+    BIAS = 1.001
+
+    def __init__(self, w, h):
+        self.w = w
+        self.h = h
+        self.depth = np.zeros((w, h))
+        self.pixels = None
+        self.clip = (0, 0, w, h)
+        self.triangles = 0
+
+    def __repr__(self):
+        return f"Rasterizer({self.w}x{self.h})"
+
+    def begin(self, surface, clip=None):
+        """
+        starts drawing into surface, only inside of the clip rectangle if given
+        the surface stays locked until end is called
+        """
+        clip = pygame.Rect(clip) if clip else pygame.Rect(0, 0, self.w, self.h)
+        clip = clip.clip(pygame.Rect(0, 0, self.w, self.h))
+        self.clip = (clip.left, clip.top, clip.right, clip.bottom)
+        x0, y0, x1, y1 = self.clip
+        self.depth[x0:x1, y0:y1] = 0
+        self.pixels = pygame.surfarray.pixels3d(surface)
+        self.triangles = 0
+
+    def end(self):
+        # releases the lock of the surface
+        self.pixels = None
+
+    def write(self, x, y, inverse_depth, color):
+        """
+        depth tested write of pixels, the nearest one wins when a pixel repeats
+        """
+        x0, y0, x1, y1 = self.clip
+        inside = (x >= x0) & (x < x1) & (y >= y0) & (y < y1)
+        x, y, inverse_depth = x[inside], y[inside], inverse_depth[inside]
+        closer = inverse_depth > self.depth[x, y]
+        x, y, inverse_depth = x[closer], y[closer], inverse_depth[closer]
+        order = np.argsort(inverse_depth, kind="stable")
+        x, y, inverse_depth = x[order], y[order], inverse_depth[order]
+        self.depth[x, y] = inverse_depth
+        self.pixels[x, y] = color
+
+    def draw_polygons(self, pixels, depths, offsets, color):
+        """
+        fills convex polygons given by pixel coordinates of shape (n, 2),
+        the depth of every vertex and the packed offsets
+        """
+        sizes = np.diff(offsets)
+        counts = np.maximum(sizes - 2, 0)
+        if not counts.sum():
+            return
+        # fan triangulation, triangle j of a polygon starting at o is (o, o + j + 1, o + j + 2)
+        starts = np.repeat(offsets[:-1], counts)
+        j = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        triangles = np.stack((starts, starts + j + 1, starts + j + 2), axis=1)
+        self.draw_triangles(pixels[triangles], 1 / depths[triangles], color)
+
+    def draw_triangles(self, corners, inverse_depths, color):
+        """
+        fills triangles with corners of shape (t, 3, 2) and inverse depths of shape (t, 3)
+        """
+        area = self.edges(corners[:, 0], corners[:, 1], corners[:, 2])
+        keep = area != 0
+        corners, inverse_depths, area = corners[keep], inverse_depths[keep], area[keep]
+        self.triangles += len(corners)
+        minimum = np.floor(corners.min(axis=1)).astype(np.int64)
+        maximum = np.ceil(corners.max(axis=1)).astype(np.int64)
+        extent = (maximum - minimum).max(axis=1)
+        small = np.zeros(len(corners), dtype=bool)
+        for size in Rasterizer.TIERS:
+            tier = (extent <= size) & ~small
+            small |= tier
+            indices = np.nonzero(tier)[0]
+            step = max(Rasterizer.BATCH // (size * size), 1)
+            for i in range(0, len(indices), step):
+                batch = indices[i:i + step]
+                self.fill(corners[batch], inverse_depths[batch], area[batch], minimum[batch], size, size, color)
+        for i in np.nonzero(~small)[0]:
+            x0, y0 = np.maximum(minimum[i], self.clip[:2])
+            x1, y1 = np.minimum(maximum[i], self.clip[2:])
+            if x0 < x1 and y0 < y1:
+                self.fill(corners[i:i + 1], inverse_depths[i:i + 1], area[i:i + 1], np.array([[x0, y0]]), x1 - x0, y1 - y0, color)
+
+    def fill(self, corners, inverse_depths, area, origins, width, height, color):
+        """
+        evaluates the edge functions of triangles at the pixel centers of
+        width x height boxes starting at origins and writes the covered pixels
+        """
+        gx, gy = np.meshgrid(np.arange(width), np.arange(height), indexing="ij")
+        x = origins[:, 0, None] + gx.ravel()
+        y = origins[:, 1, None] + gy.ravel()
+        p = np.stack((x + 0.5, y + 0.5), axis=2)
+        a, b, c = corners[:, 0, None], corners[:, 1, None], corners[:, 2, None]
+        # barycentric weights of the opposite corners
+        w0 = self.edges(b, c, p) / area[:, None]
+        w1 = self.edges(c, a, p) / area[:, None]
+        w2 = 1 - w0 - w1
+        inside = (w0 >= 0) & (w1 >= 0) & (w2 >= 0)
+        inverse_depth = w0 * inverse_depths[:, 0, None] + w1 * inverse_depths[:, 1, None] + w2 * inverse_depths[:, 2, None]
+        self.write(x[inside], y[inside], inverse_depth[inside], color)
+
+    @staticmethod
+    def edges(a, b, p):
+        """
+        edge function, twice the signed area of the triangle a, b, p
+        """
+        return (b[..., 0] - a[..., 0]) * (p[..., 1] - a[..., 1]) - (b[..., 1] - a[..., 1]) * (p[..., 0] - a[..., 0])
+
+    def draw_lines(self, ends, depths, color):
+        """
+        draws one pixel wide lines with ends of shape (m, 2, 2) and depths of shape (m, 2)
+        """
+        if not len(ends):
+            return
+        lengths = np.ceil(np.abs(ends[:, 1] - ends[:, 0]).max(axis=1)).astype(np.int64) + 1
+        line = np.repeat(np.arange(len(ends)), lengths)
+        t = (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)) / np.maximum(lengths - 1, 1)[line]
+        start, end = ends[line, 0], ends[line, 1]
+        position = start + t[:, None] * (end - start)
+        inverse = 1 / depths
+        inverse_depth = (inverse[line, 0] + t * (inverse[line, 1] - inverse[line, 0])) * Rasterizer.BIAS
+        self.write(np.floor(position[:, 0]).astype(np.int64), np.floor(position[:, 1]).astype(np.int64), inverse_depth, color)
+
+    def draw_points(self, centers, depths, radius, color):
+        """
+        draws filled circles around centers of shape (q, 2)
+        """
+        if not len(centers):
+            return
+        r = int(np.ceil(radius))
+        dx, dy = np.meshgrid(np.arange(-r, r + 1), np.arange(-r, r + 1), indexing="ij")
+        disk = (dx * dx + dy * dy) <= radius * radius
+        dx, dy = dx[disk], dy[disk]
+        x = (np.floor(centers[:, 0, None]).astype(np.int64) + dx).ravel()
+        y = (np.floor(centers[:, 1, None]).astype(np.int64) + dy).ravel()
+        inverse_depth = np.repeat(Rasterizer.BIAS / depths, len(dx))
+        self.write(x, y, inverse_depth, color)
+
+    def draw_rects(self, rects, depths, color):
+        """
+        fills rectangles facing the camera at the given depths
+        """
+        for rect, depth in zip(rects, depths):
+            x0, y0, x1, y1 = max(rect.left, self.clip[0]), max(rect.top, self.clip[1]), min(rect.right, self.clip[2]), min(rect.bottom, self.clip[3])
+            if x0 < x1 and y0 < y1:
+                region = self.depth[x0:x1, y0:y1]
+                closer = 1 / depth > region
+                region[closer] = 1 / depth
+                self.pixels[x0:x1, y0:y1][closer] = color
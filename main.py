@@ -1,5 +1,9 @@
+import sys
 from display.app import App
 from core.cube import Cube
+from core.loader import load_scene
 
-app = App(objects=[Cube(5, 0, 0, 1)])
+# python main.py [scene.json]
+objects = load_scene(sys.argv[1]) if len(sys.argv) > 1 else [Cube(5, 0, 0, 1)]
+app = App(objects=objects)
 app.run()
@@ -0,0 +1,77 @@
+import numpy as np
+from core.bvh import BVH
+from core.cube import Cube, unit_cube
+from core.frustum import Frustum
+from core.scene import SceneGraph, SceneNode
+
+def box(low, high):
+    """
+    Frustum of the axis aligned box between the points low and high
+    """
+    planes = []
+    for axis in range(3):
+        normal = np.zeros(3)
+        normal[axis] = 1
+        planes.append((*normal, -low[axis]))
+        planes.append((*-normal, high[axis]))
+    return Frustum(planes)
+
+def cubes(count):
+    return [Cube(2.0 * i, 0, 0, 1) for i in range(count)]
+
+def test_insert_matches_rebuilt_tree():
+    objects = cubes(40)
+    bvh = BVH(objects[:30], leaf_size=4)
+    for obj in objects[30:]:
+        bvh.insert(obj)
+    frustum = box((9, -1, -1), (51, 1, 1))
+    assert bvh.query(frustum) == BVH(objects, leaf_size=4).query(frustum)
+
+def test_refit_inserts_unknown_objects():
+    objects = cubes(20)
+    bvh = BVH(objects[:10], leaf_size=4)
+    bvh.refit(objects[10:])
+    assert len(bvh) == 20
+    visible, culled = bvh.query(box((-1, -1, -1), (100, 1, 1)))
+    assert visible == objects and culled == 0
+
+def test_refit_moved_object():
+    objects = cubes(20)
+    bvh = BVH(objects, leaf_size=4)
+    moved = Cube(100, 0, 0, 1)
+    objects[3].mesh = moved.mesh
+    bvh.refit([objects[3]])
+    visible, _ = bvh.query(box((99, -1, -1), (101, 1, 1)))
+    assert visible == [objects[3]]
+
+def test_graph_node_added_after_tree_is_refitted():
+    graph = SceneGraph()
+    graph.add(SceneNode(unit_cube(), position=(0, 0, 0)))
+    graph.update()
+    bvh = BVH(graph.objects())
+    node = graph.add(SceneNode(unit_cube(), position=(5, 0, 0)))
+    bvh.refit(graph.update())
+    visible, _ = bvh.query(box((4, -1, -1), (6, 1, 1)))
+    assert visible == [node]
+
+def test_graph_bounds_after_read_between_mark_and_update():
+    graph = SceneGraph()
+    group = graph.add(SceneNode(name="group"))
+    child = graph.add(SceneNode(unit_cube()), group)
+    graph.update()
+    assert np.allclose(group.bounds[1], (0.5, 0.5, 0.5))
+    child.move_to((3, 0, 0))
+    # reading the stale bounds caches them again before the update
+    group.bounds
+    graph.update()
+    assert np.allclose(group.bounds[1], (3.5, 0.5, 0.5))
+    assert np.allclose(graph.root.bounds[1], (3.5, 0.5, 0.5))
+
+def test_merge_matches_tree_of_all_objects():
+    objects = [Cube(2.0 * i, 3.0 * (i % 4), 0, 1) for i in range(60)]
+    trees = [BVH(objects[a:b]) for a, b in ((0, 13), (13, 13), (13, 40), (40, 60))]
+    merged = BVH.merge(trees)
+    for frustum in (box((9, -1, -1), (51, 4, 1)), box((-1, -1, -1), (200, 20, 1)), box((70, 2, -1), (90, 7, 1))):
+        assert merged.query(frustum) == BVH(objects).query(frustum)
+    merged.refit([Cube(500, 0, 0, 1)])
+    assert len(merged) == 61
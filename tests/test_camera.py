@@ -0,0 +1,29 @@
+import os
+from core.camera import Camera
+from core.cube import Cube
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+def test_view_is_rebuilt_only_when_it_changes():
+    camera = Camera()
+    camera.view()
+    camera.view()
+    assert camera.rebuilds == 1
+    camera.fov *= 0.5
+    camera.view()
+    assert camera.rebuilds == 2
+
+def test_changed_clipping_planes_rebuild_the_view():
+    camera = Camera()
+    camera.view()
+    camera.clipping_planes = (0.5, 20)
+    camera.view()
+    assert camera.rebuilds == 2
+
+def test_changed_clipping_planes_redraw_an_idle_frame():
+    from display.app import App
+    app = App(objects=[Cube(3, 0, 0, 1)], headless=True, size=(160, 90))
+    assert app.draw_frame()
+    assert not app.draw_frame()
+    app.camera.clipping_planes = (1, 3)
+    assert app.draw_frame()
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from core.camera import Camera
+from core.clipping import PackedPolygons, clip_polygons, window_planes, depth_planes
+from core.cube import Cube
+from core.rotation import Rotation
+from core.window import WindowPoint, WindowPolygon
+from core.world import WorldPoint, WorldPolygon
+from benchmarks.clipping import random_polygons
+
+BOUNDS = (-0.5, -0.3, 0.5, 0.3)
+
+def same_polygon(expected, vertices):
+    """
+    whether vertices are the expected vertices, starting at any of them
+    """
+    expected = np.asarray(expected, dtype=float)
+    return len(expected) == len(vertices) and any(np.allclose(np.roll(expected, k, axis=0), vertices) for k in range(len(expected)))
+
+def assert_same_polygons(reference, packed):
+    reference = [polygon for polygon in reference if polygon is not None]
+    assert len(reference) == len(packed)
+    for polygon, vertices in zip(reference, packed):
+        assert same_polygon([tuple(vertex) for vertex in polygon.vertices], vertices)
+
+def test_window_polygons_match_scalar_clipper():
+    rng = np.random.default_rng(0)
+    polygons = [WindowPolygon([WindowPoint(*vertex) for vertex in polygon.tolist()]) for polygon in random_polygons(rng, 500, 2, 1.5)]
+    window = (-1, -0.75, 1, 0.75)
+    result = clip_polygons(PackedPolygons.from_polygons(polygons, 2), window_planes(*window))
+    assert_same_polygons([polygon.clipped(*window) for polygon in polygons], result)
+
+def test_world_polygons_match_scalar_clipper():
+    rng = np.random.default_rng(1)
+    polygons = [WorldPolygon([WorldPoint(*vertex) for vertex in polygon.tolist()]) for polygon in random_polygons(rng, 500, 3, 3)]
+    polygons = [WorldPolygon([WorldPoint(p.x + 3, p.y, p.z) for p in polygon.vertices]) for polygon in polygons]
+    result = clip_polygons(PackedPolygons.from_polygons(polygons, 3), depth_planes(1, 5))
+    assert_same_polygons([polygon.clipped(1, 5) for polygon in polygons], result)
+
+@pytest.mark.parametrize("cube, faces", [
+    # in front of the camera and inside of the window
+    (Cube(3, 0, 0, 0.5), 6),
+    # behind the camera
+    (Cube(-3, 0, 0, 1), 0),
+    # crossing the near plane and the edges of the window
+    (Cube(1.2, 0.8, 0, 1.5), 5),
+    # around the camera
+    (Cube(0, 0, 0, 2), 3)
+])
+def test_render_meshes_matches_scalar_path(cube, faces):
+    camera = Camera()
+    camera.rotation = Rotation(0.2, 0.1)
+    screen = camera.render_meshes([cube.mesh], BOUNDS, False)
+    expected = {}
+    for i, face in enumerate(cube.faces):
+        polygon = camera.render_polygon(face)
+        polygon = polygon.clipped(*BOUNDS) if polygon else None
+        if polygon:
+            expected[i] = [(p.x, p.y) for p in polygon.vertices]
+    assert len(expected) == faces
+    assert screen.polygons.sources.tolist() == list(expected)
+    for source, vertices in zip(screen.polygons.sources.tolist(), screen.polygons):
+        assert same_polygon(expected[source], vertices[:, :2])
@@ -0,0 +1,30 @@
+import pytest
+from core.cube import Cube
+from core.grid import SpatialGrid
+from core.voxel import VoxelWorld
+
+def test_large_delta_stops_at_thin_box():
+    # a wall 0.1 thick, the box moves 10 units past it in one step
+    wall = Cube(5, 0, 0, 0.1)
+    grid = SpatialGrid([wall], cell=2.0)
+    moved, blocked = grid.sweep((-0.5, -0.5, -0.5), (0.5, 0.5, 0.5), (10, 0, 0))
+    assert blocked == [True, False, False]
+    assert moved[0] == pytest.approx(4.95 - 0.5 - SpatialGrid.SKIN)
+    moved, blocked = grid.sweep((9.5, -0.5, -0.5), (10.5, 0.5, 0.5), (-10, 0, 0))
+    assert blocked == [True, False, False]
+    assert moved[0] == pytest.approx(5.05 - 9.5 + SpatialGrid.SKIN)
+
+def test_box_can_leave_an_overlapped_box():
+    grid = SpatialGrid([Cube(0, 0, 0, 1)])
+    moved, blocked = grid.sweep((-0.2, -0.2, -0.2), (0.2, 0.2, 0.2), (3, 0, 0))
+    assert moved == [3, 0.0, 0.0] and blocked == [False, False, False]
+
+def test_overlapped_voxel_does_not_unblock_the_chunk():
+    world = VoxelWorld()
+    # the box starts inside of the voxel at the origin, a wall of voxels is ahead of it
+    world.set(0, 0, 0)
+    world.fill((3, 0, 0), (4, 1, 1))
+    grid = SpatialGrid(world.objects())
+    moved, blocked = grid.sweep((0.25, 0.25, 0.25), (0.75, 0.75, 0.75), (5, 0, 0))
+    assert blocked == [True, False, False]
+    assert moved[0] == pytest.approx(3 - 0.75 - SpatialGrid.SKIN)
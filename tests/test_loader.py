@@ -0,0 +1,84 @@
+import os
+import numpy as np
+import pytest
+from core import loader
+
+TRIANGLE = "v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n"
+SQUARE = "v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3 4\n"
+
+@pytest.fixture
+def parses(monkeypatch):
+    """
+    list growing by one for every time an OBJ file is parsed instead of read from the cache
+    """
+    calls = []
+    parse_obj = loader.parse_obj
+    def counted(lines, y_up=True):
+        calls.append(y_up)
+        return parse_obj(lines, y_up)
+    monkeypatch.setattr(loader, "parse_obj", counted)
+    return calls
+
+def write(path, text, mtime_ns=None):
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+    return str(path)
+
+def test_cached_mesh_is_not_parsed_again(tmp_path, parses):
+    path = write(tmp_path / "square.obj", SQUARE)
+    first = loader.load_mesh(path)
+    second = loader.load_mesh(path)
+    assert len(parses) == 1
+    assert np.array_equal(first.vertices, second.vertices)
+    assert np.array_equal(first.face_normals, second.face_normals)
+
+def test_changed_size_is_parsed_again(tmp_path, parses):
+    path = write(tmp_path / "mesh.obj", TRIANGLE, 10 ** 18)
+    loader.load_mesh(path)
+    write(tmp_path / "mesh.obj", SQUARE, 10 ** 18)
+    assert len(loader.load_mesh(path).vertices) == 4
+    assert len(parses) == 2
+
+def test_changed_mtime_is_parsed_again(tmp_path, parses):
+    path = write(tmp_path / "mesh.obj", TRIANGLE, 10 ** 18)
+    loader.load_mesh(path)
+    # same size, different content
+    write(tmp_path / "mesh.obj", TRIANGLE.replace("v 1 0 0", "v 2 0 0"), 10 ** 18 + 1)
+    assert loader.load_mesh(path).vertices[1].tolist() == [2, 0, 0]
+    assert len(parses) == 2
+
+def test_changed_y_up_is_parsed_again(tmp_path, parses):
+    path = write(tmp_path / "mesh.obj", TRIANGLE)
+    loader.load_mesh(path, y_up=True)
+    mesh = loader.load_mesh(path, y_up=False)
+    assert parses == [True, False]
+    assert mesh.vertices[2].tolist() == [0, 1, 0]
+
+def test_changed_version_is_parsed_again(tmp_path, parses, monkeypatch):
+    path = write(tmp_path / "mesh.obj", TRIANGLE)
+    loader.load_mesh(path)
+    monkeypatch.setattr(loader, "CACHE_VERSION", loader.CACHE_VERSION + 1)
+    loader.load_mesh(path)
+    loader.load_mesh(path)
+    assert len(parses) == 2
+
+def test_entry_without_key_is_ignored(tmp_path, parses):
+    path = write(tmp_path / "mesh.obj", SQUARE)
+    loader.load_mesh(path)
+    key_path, array_paths = loader.cache_paths(path)
+    # as if writing stopped after the arrays of an older file, before the key
+    os.remove(key_path)
+    np.save(array_paths["vertices"], np.zeros((3, 3)))
+    assert loader.read_cache(path, loader.cache_key(path, True)) is None
+    mesh = loader.load_mesh(path)
+    assert len(parses) == 2 and len(mesh.vertices) == 4
+    assert loader.read_cache(path, loader.cache_key(path, True)) is not None
+
+def test_entry_with_missing_array_is_ignored(tmp_path, parses):
+    path = write(tmp_path / "mesh.obj", SQUARE)
+    loader.load_mesh(path)
+    _, array_paths = loader.cache_paths(path)
+    os.remove(array_paths["face_normals"])
+    assert len(loader.load_mesh(path).face_normals) == 1
+    assert len(parses) == 2
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from core.camera import Camera
+from core.cube import Cube, unit_cube
+from core.instancing import Instances
+from core.parallel import ParallelRenderer
+from core.rotation import Rotation
+from core.world import WorldPoint
+
+BOUNDS = (-0.5, -0.3, 0.5, 0.3)
+
+def scene():
+    """
+    cubes in front of, around and behind the camera and a group of instanced cubes
+    """
+    rng = np.random.default_rng(0)
+    cubes = [Cube(*rng.uniform((-2, -6, -2), (12, 6, 2)), rng.uniform(0.3, 1.5)) for _ in range(40)]
+    instances = Instances(unit_cube(), rng.uniform((0, -4, -1), (10, 4, 1), (30, 3)), rng.uniform(0.2, 1, 30))
+    return [cube.mesh for cube in cubes] + [obj.mesh for obj in instances.objects()]
+
+def camera():
+    camera = Camera()
+    camera.position = WorldPoint(-1, 0.5, 0.2)
+    camera.rotation = Rotation(0.1, -0.05)
+    return camera
+
+def assert_same(screen, expected):
+    assert np.array_equal(screen.polygons.vertices, expected.polygons.vertices)
+    assert np.array_equal(screen.polygons.offsets, expected.polygons.offsets)
+    assert np.array_equal(screen.polygons.sources, expected.polygons.sources)
+    assert np.array_equal(screen.polygon_objects, expected.polygon_objects)
+    assert np.array_equal(screen.lines, expected.lines)
+    assert np.array_equal(screen.line_objects, expected.line_objects)
+    assert np.array_equal(screen.points, expected.points)
+    assert np.array_equal(screen.point_objects, expected.point_objects)
+
+def move(meshes, step):
+    """
+    moves the cubes and the instances by step, the meshes keep their sizes
+    """
+    for mesh in meshes:
+        instances = getattr(mesh, "instances", None)
+        if instances is not None:
+            instances.positions[mesh.index] += step
+            instances.update_bounds()
+        else:
+            mesh.vertices = mesh.vertices + step
+            mesh.update_bounds()
+
+@pytest.mark.parametrize("processes", [False, True])
+def test_same_geometry_as_single_threaded(processes):
+    meshes = scene()
+    renderer = ParallelRenderer(workers=3, processes=processes)
+    try:
+        renderer.set_scene(meshes)
+        for cull in (True, False):
+            assert_same(renderer.render_meshes(camera(), meshes, BOUNDS, cull), camera().render_meshes(meshes, BOUNDS, cull))
+        # moved meshes are written in place, then the whole scene again with the same sizes
+        move(meshes[::3], np.array([0.5, -0.25, 0.1]))
+        assert renderer.update_meshes(meshes[::3])
+        assert_same(renderer.render_meshes(camera(), meshes, BOUNDS), camera().render_meshes(meshes, BOUNDS))
+        layout, pool = renderer.layout, renderer.pool
+        move(meshes, np.array([0.0, 0.3, 0.0]))
+        renderer.set_scene(meshes)
+        assert renderer.layout is layout and renderer.pool is pool
+        assert_same(renderer.render_meshes(camera(), meshes, BOUNDS), camera().render_meshes(meshes, BOUNDS))
+        # a different scene is shared anew and rendered without falling back
+        renderer.set_scene(meshes[:25])
+        assert_same(renderer.render_meshes(camera(), meshes[:25], BOUNDS), camera().render_meshes(meshes[:25], BOUNDS))
+        assert renderer.fallbacks == 0
+    finally:
+        renderer.close()
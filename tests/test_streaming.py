@@ -0,0 +1,39 @@
+import logging
+from core.streaming import WorldStreamer, generated_tiles
+
+def test_failing_tile_is_retried_after_a_delay(monkeypatch):
+    monkeypatch.setattr(logging.getLogger("core.streaming"), "disabled", True)
+    tiles = generated_tiles(5)
+    calls = []
+    def source(key, tile_size):
+        calls.append(key)
+        if key == (0, 0):
+            raise OSError("unreadable tile")
+        return tiles(key, tile_size)
+    streamer = WorldStreamer(source, tile_size=8.0, distance=4.0, retry_delay=10.0)
+    now = [0.0]
+    monkeypatch.setattr("core.streaming.monotonic", lambda: now[0])
+    for _ in range(10):
+        streamer.update((4, 4), block=True)
+    assert calls == [(0, 0)] and streamer.failed == 1
+    assert streamer.failures[(0, 0)] == (1, 10.0)
+    now[0] = 10.0
+    streamer.update((4, 4), block=True)
+    assert calls == [(0, 0)] * 2 and streamer.failures[(0, 0)] == (2, 10.0 + 20.0)
+    streamer.close()
+
+def test_tile_loaded_after_failure_is_activated(monkeypatch):
+    monkeypatch.setattr(logging.getLogger("core.streaming"), "disabled", True)
+    tiles = generated_tiles(5)
+    fail = [True]
+    def source(key, tile_size):
+        if fail[0]:
+            raise OSError("unreadable tile")
+        return tiles(key, tile_size)
+    streamer = WorldStreamer(source, tile_size=8.0, distance=4.0, retry_delay=0.0)
+    assert not streamer.update((4, 4), block=True)
+    fail[0] = False
+    assert streamer.update((4, 4), block=True)
+    assert [tile.key for tile in streamer.entered] == [(0, 0)] and not streamer.failures
+    assert len(streamer.bvh()) == len(streamer.objects()) == 5
+    streamer.close()